@@ -13,21 +13,31 @@ module MSAUtils {
   */
   typedef string obj_ref;
 
+  /*
+    file_format - the alignment format, as named by Bio.AlignIO (default 'fasta'), or 'auto' to
+        detect it from the file header
+    multiple_alignments - import every alignment in the file (e.g. a Stockholm or PHYLIP file
+        holding many alignments) as its own MSA object named <msa_name>_<index>
+    parallel_workers - parse an uncompressed FASTA file in chunks across this many processes
+  */
     typedef structure {
       string input_shock_id;
       string input_file_path;
       string input_staging_file_path;
       string file_format;
+      boolean multiple_alignments;
+      int parallel_workers;
       string msa_name;
       string description;
       string workspace_name;
   } ImportMSAParams;
 
-  /* @optional report_name report_ref */
+  /* @optional report_name report_ref msa_obj_refs */
   typedef structure {
       string report_name;
       obj_ref report_ref;
       obj_ref msa_obj_ref;
+      list<obj_ref> msa_obj_refs;
   } ImportMSAOutput;
 
   /* import_msa_file: import a MSA from FASTA*/
@@ -37,9 +47,22 @@ module MSAUtils {
         string file_path;
     } MSAFilesOutput;
 
+    /*
+      input_ref - the MSA to write out
+      destination_dir - the directory to write the file to
+      rows - only write these rows, in this order; only they are fetched from the workspace
+      column_range - only write the alignment columns [first, last], 1-based and inclusive
+      max_gap_fraction - drop the columns whose fraction of gaps is over this value
+      min_row_coverage - drop the rows whose fraction of non-gaps in the kept columns is under
+          this value
+    */
     typedef structure {
-        string msa_name;
-        string workspace_name;
+        obj_ref input_ref;
+        string destination_dir;
+        list<string> rows;
+        tuple<int, int> column_range;
+        float max_gap_fraction;
+        float min_row_coverage;
     } MSAToFileParams;
 
     funcdef msa_to_fasta_file(MSAToFileParams params)
@@ -48,9 +71,43 @@ module MSAUtils {
     funcdef msa_to_clustal_file(MSAToFileParams params)
                 returns(MSAFilesOutput files) authentication required;
 
+    /* msa_to_phylip_file: relaxed PHYLIP, names are padded to the longest row id */
+    funcdef msa_to_phylip_file(MSAToFileParams params)
+                returns(MSAFilesOutput files) authentication required;
+
+    /* msa_to_strict_phylip_file: strict PHYLIP, names are truncated to 10 characters */
+    funcdef msa_to_strict_phylip_file(MSAToFileParams params)
+                returns(MSAFilesOutput files) authentication required;
+
+    funcdef msa_to_stockholm_file(MSAToFileParams params)
+                returns(MSAFilesOutput files) authentication required;
+
+    funcdef msa_to_nexus_file(MSAToFileParams params)
+                returns(MSAFilesOutput files) authentication required;
+
+    /* msa_to_a2m_file: A2M, the columns where the first row has a residue are matches */
+    funcdef msa_to_a2m_file(MSAToFileParams params)
+                returns(MSAFilesOutput files) authentication required;
 
+    /* msa_to_a3m_file: A3M, that is A2M without the gaps of insert columns */
+    funcdef msa_to_a3m_file(MSAToFileParams params)
+                returns(MSAFilesOutput files) authentication required;
+
+
+    /*
+      input_ref - the MSA to export
+      rows - only export these rows, in this order; only they are fetched from the workspace
+      column_range - only export the alignment columns [first, last], 1-based and inclusive
+      max_gap_fraction - drop the columns whose fraction of gaps is over this value
+      min_row_coverage - drop the rows whose fraction of non-gaps in the kept columns is under
+          this value
+    */
     typedef structure {
         obj_ref input_ref;
+        list<string> rows;
+        tuple<int, int> column_range;
+        float max_gap_fraction;
+        float min_row_coverage;
     } ExportParams;
 
     typedef structure {
@@ -62,4 +119,82 @@ module MSAUtils {
 
     funcdef export_msa_as_clustal_file(ExportParams params)
                 returns (ExportOutput output) authentication required;
+
+    /* export_msa_as_phylip_file: relaxed PHYLIP, names are padded to the longest row id */
+    funcdef export_msa_as_phylip_file(ExportParams params)
+                returns (ExportOutput output) authentication required;
+
+    /* export_msa_as_strict_phylip_file: strict PHYLIP, names are truncated to 10 characters */
+    funcdef export_msa_as_strict_phylip_file(ExportParams params)
+                returns (ExportOutput output) authentication required;
+
+    funcdef export_msa_as_stockholm_file(ExportParams params)
+                returns (ExportOutput output) authentication required;
+
+    funcdef export_msa_as_nexus_file(ExportParams params)
+                returns (ExportOutput output) authentication required;
+
+    /* export_msa_as_a2m_file: A2M, the columns where the first row has a residue are matches */
+    funcdef export_msa_as_a2m_file(ExportParams params)
+                returns (ExportOutput output) authentication required;
+
+    /* export_msa_as_a3m_file: A3M, that is A2M without the gaps of insert columns */
+    funcdef export_msa_as_a3m_file(ExportParams params)
+                returns (ExportOutput output) authentication required;
+
+    /*
+      input_ref - the MSA to export
+      rows - only export these rows, in this order; only they are fetched from the workspace
+      drop_empty_rows - leave out the rows that are all gaps
+    */
+    typedef structure {
+        obj_ref input_ref;
+        list<string> rows;
+        boolean drop_empty_rows;
+    } ExportUnalignedParams;
+
+    /* export_msa_as_unaligned_fasta: the sequences of the MSA with their gaps removed */
+    funcdef export_msa_as_unaligned_fasta(ExportUnalignedParams params)
+                returns (ExportOutput output) authentication required;
+
+    /*
+      input_ref - the MSA to export
+      formats - the file formats to export it in, e.g. ["fasta", "clustal", "phylip"]
+      rows, column_range, max_gap_fraction, min_row_coverage - as for ExportParams
+    */
+    typedef structure {
+        obj_ref input_ref;
+        list<string> formats;
+        list<string> rows;
+        tuple<int, int> column_range;
+        float max_gap_fraction;
+        float min_row_coverage;
+    } ExportFilesParams;
+
+    /* shock_ids - the shock id of the gzipped export file of each format */
+    typedef structure {
+        mapping<string, string> shock_ids;
+    } ExportFilesOutput;
+
+    /* export_msa_files: export one MSA in several formats from a single fetch of the object */
+    funcdef export_msa_files(ExportFilesParams params)
+                returns (ExportFilesOutput output) authentication required;
+
+    /*
+      input_refs - the MSAs to export
+      format - the file format to export them in, e.g. "fasta"
+    */
+    typedef structure {
+        list<obj_ref> input_refs;
+        string format;
+    } ExportBatchParams;
+
+    /* shock_ids - the shock id of the gzipped export file of each input ref */
+    typedef structure {
+        mapping<obj_ref, string> shock_ids;
+    } ExportBatchOutput;
+
+    /* export_msas_batch: export many MSAs in one format with batched fetches and one upload */
+    funcdef export_msas_batch(ExportBatchParams params)
+                returns (ExportBatchOutput output) authentication required;
 };
@@ -0,0 +1,188 @@
+import json
+
+import numpy as np
+
+from MSAUtils.Core.MSAReaders import NUCLEOTIDE_BYTES
+
+# lookup table of the byte values allowed in a nucleotide alignment
+NUCLEOTIDE_TABLE = np.zeros(256, dtype=bool)
+NUCLEOTIDE_TABLE[np.frombuffer(NUCLEOTIDE_BYTES, dtype=np.uint8)] = True
+
+GAP_BYTES = b'-.'
+
+# lookup table of the byte values that are gaps
+GAP_TABLE = np.zeros(256, dtype=bool)
+GAP_TABLE[np.frombuffer(GAP_BYTES, dtype=np.uint8)] = True
+
+
+def msa_data_records(data):
+    """
+    msa_data_records: yield (row_id, row_label, sequence) for each row of a KBaseTrees.MSA data
+                      dict, in row_order order
+    """
+    alignment = data['alignment']
+    row_labels = data.get('default_row_labels', {})
+    for row_id in data.get('row_order') or list(alignment):
+        yield row_id, row_labels.get(row_id, ''), alignment[row_id]
+
+
+class AlignmentMatrix:
+    """
+    A multiple sequence alignment held as one contiguous, row-major uint8 matrix of residue
+    bytes (one row per sequence) plus the row ids, row labels and sequence type.
+
+    Rows and columns are returned as numpy views of the matrix, so slicing the alignment never
+    copies residues. Conversion to and from the KBaseTrees.MSA data dict encodes or decodes
+    each row exactly once.
+    """
+
+    # rows checked per step when inferring the sequence type
+    TYPE_CHECK_ROWS = 1024
+
+    def __init__(self, matrix, row_ids, row_labels=None, sequence_type=None):
+        if matrix.ndim != 2 or matrix.dtype != np.uint8:
+            raise ValueError('An alignment matrix must be a 2 dimensional uint8 array')
+        if matrix.shape[0] != len(row_ids):
+            raise ValueError('The alignment matrix must have one row per row id')
+
+        self.matrix = matrix
+        self.row_ids = list(row_ids)
+        self.row_labels = list(row_labels) if row_labels is not None else list(self.row_ids)
+        self.sequence_type = sequence_type or self.infer_sequence_type()
+
+    @classmethod
+    def from_records(cls, records, sequence_type=None):
+        """
+        from_records: build a matrix from (row_id, description, sequence) records, such as those
+                      yielded by the MSAReaders functions
+                      Sequences may be str or ASCII bytes; bytes are copied into the matrix as
+                      they are, without a decode and re-encode
+        """
+        row_ids = []
+        row_labels = []
+        buffer = bytearray()
+        alignment_length = None
+        for row_id, description, sequence in records:
+            if isinstance(sequence, str):
+                sequence = sequence.encode('ascii')
+            if alignment_length is None:
+                alignment_length = len(sequence)
+            elif len(sequence) != alignment_length:
+                raise ValueError('Sequences must all be the same length')
+
+            row_ids.append(row_id)
+            row_labels.append(description)
+            buffer += sequence
+
+        if alignment_length is None:
+            raise ValueError('No records found in handle')
+
+        matrix = np.frombuffer(buffer, dtype=np.uint8).reshape(len(row_ids), alignment_length)
+        if matrix.size and matrix.max() >= 0x80:
+            # str rows are checked by encode, this catches non-ASCII bytes rows
+            raise ValueError('Sequences must only hold ASCII characters')
+
+        return cls(matrix, row_ids, row_labels, sequence_type)
+
+    @classmethod
+    def from_msa_data(cls, data):
+        """
+        from_msa_data: build a matrix from a KBaseTrees.MSA data dict, in row_order order
+        """
+        return cls.from_records(msa_data_records(data), data.get('sequence_type'))
+
+    def to_msa_data(self):
+        """
+        to_msa_data: return the alignment as a KBaseTrees.MSA data dict
+        """
+        return {'alignment': {row_id: sequence for row_id, _, sequence in self.records()},
+                'default_row_labels': dict(zip(self.row_ids, self.row_labels)),
+                'row_order': list(self.row_ids),
+                'alignment_length': self.alignment_length,
+                'sequence_type': self.sequence_type,
+                }
+
+    def write_msa_json(self, handle, **fields):
+        """
+        write_msa_json: write the KBaseTrees.MSA data dict of to_msa_data, plus fields, as JSON
+                        to a text handle, encoding the alignment one row at a time
+        """
+        handle.write('{"alignment": {')
+        for index, (row_id, _, sequence) in enumerate(self.records()):
+            if index:
+                handle.write(', ')
+            handle.write(f'{json.dumps(row_id)}: {json.dumps(sequence)}')
+
+        data = {'default_row_labels': dict(zip(self.row_ids, self.row_labels)),
+                'row_order': list(self.row_ids),
+                'alignment_length': self.alignment_length,
+                'sequence_type': self.sequence_type}
+        data.update(fields)
+        handle.write('}, ')
+        handle.write(json.dumps(data)[1:])
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    @property
+    def alignment_length(self):
+        return self.matrix.shape[1]
+
+    def row(self, index):
+        """row: a view of one row's residue bytes"""
+        return self.matrix[index]
+
+    def column(self, index):
+        """column: a view of one column's residue bytes, top to bottom"""
+        return self.matrix[:, index]
+
+    def row_string(self, index):
+        """row_string: one row decoded to a str"""
+        return self.matrix[index].tobytes().decode('ascii')
+
+    def records(self):
+        """
+        records: yield (row_id, row_label, sequence) for each row, decoding rows one at a time
+        """
+        for index, (row_id, row_label) in enumerate(zip(self.row_ids, self.row_labels)):
+            yield row_id, row_label, self.row_string(index)
+
+    def infer_sequence_type(self):
+        """
+        infer_sequence_type: "dna" if every residue is a nucleotide (DNA, RNA or IUPAC ambiguity)
+                             code or a gap, "protein" as soon as a block of rows holds anything
+                             else
+        """
+        for start in range(0, len(self), self.TYPE_CHECK_ROWS):
+            if not NUCLEOTIDE_TABLE[self.matrix[start:start + self.TYPE_CHECK_ROWS]].all():
+                return "protein"
+        return "dna"
+
+    def filter_gaps(self, max_gap_fraction=None, min_row_coverage=None):
+        """
+        filter_gaps: a new matrix without the columns whose gap fraction is over
+                     max_gap_fraction and the rows whose coverage (non-gap fraction of the kept
+                     columns) is under min_row_coverage
+
+        The gap mask is computed once over the whole matrix and both filters are taken from
+        its column and row sums.
+        """
+        gaps = GAP_TABLE[self.matrix]
+
+        columns = np.ones(self.alignment_length, dtype=bool)
+        if max_gap_fraction is not None and len(self):
+            columns = gaps.sum(axis=0) <= max_gap_fraction * len(self)
+
+        rows = np.ones(len(self), dtype=bool)
+        kept_columns = int(columns.sum())
+        if min_row_coverage is not None and kept_columns:
+            covered = kept_columns - gaps[:, columns].sum(axis=1)
+            rows = covered >= min_row_coverage * kept_columns
+
+        if not rows.any() or not columns.any():
+            raise ValueError('No alignment is left after removing gappy rows and columns')
+
+        return AlignmentMatrix(np.ascontiguousarray(self.matrix[np.ix_(rows, columns)]),
+                               [row_id for row_id, keep in zip(self.row_ids, rows) if keep],
+                               [label for label, keep in zip(self.row_labels, rows) if keep],
+                               self.sequence_type)
@@ -0,0 +1,103 @@
+import json
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+
+# workspace references of the form ws/obj/ver never change what they point to
+VERSIONED_REF = re.compile(r'^\d+/\d+/\d+$')
+
+
+class ExportCache:
+    """
+    A persistent map from (versioned workspace ref, file format, export options) to the shock id
+    of the file already exported for it.
+
+    Entries live in a SQLite database so that concurrent server workers can share them. Each
+    lookup refreshes the entry's last use time, entries older than ttl seconds are dropped on
+    lookup and the least recently used entries beyond max_entries are evicted on insert.
+    """
+
+    def __init__(self, cache_dir, max_entries=10000, ttl=7 * 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        if not max_entries:
+            # a disabled cache never touches cache_dir
+            return
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, 'export_cache.sqlite')
+
+        with self._connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS exports ('
+                         'cache_key TEXT PRIMARY KEY, '
+                         'shock_id TEXT NOT NULL, '
+                         'created REAL NOT NULL, '
+                         'last_used REAL NOT NULL)')
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def cacheable(ref):
+        """cacheable: only versioned references are safe to cache"""
+        return bool(VERSIONED_REF.match(ref))
+
+    @staticmethod
+    def _cache_key(ref, file_type, options):
+        return json.dumps([ref, file_type, options or {}], sort_keys=True)
+
+    def get(self, ref, file_type, options=None):
+        """
+        get: the cached shock id for an export, or None
+        """
+        if not self.max_entries or not self.cacheable(ref):
+            return None
+
+        cache_key = self._cache_key(ref, file_type, options)
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute('SELECT shock_id, created FROM exports WHERE cache_key = ?',
+                               (cache_key,)).fetchone()
+            if row is None:
+                return None
+            shock_id, created = row
+            if now - created > self.ttl:
+                conn.execute('DELETE FROM exports WHERE cache_key = ?', (cache_key,))
+                return None
+            conn.execute('UPDATE exports SET last_used = ? WHERE cache_key = ?',
+                         (now, cache_key))
+
+        return shock_id
+
+    def put(self, ref, file_type, options, shock_id):
+        """
+        put: record the shock id produced for an export and evict the least recently used
+             entries over max_entries
+        """
+        if not self.max_entries or not self.cacheable(ref):
+            return
+
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO exports VALUES (?, ?, ?, ?)',
+                         (self._cache_key(ref, file_type, options), shock_id, now, now))
+            conn.execute('DELETE FROM exports WHERE cache_key NOT IN '
+                         '(SELECT cache_key FROM exports ORDER BY last_used DESC LIMIT ?)',
+                         (self.max_entries,))
+
+    def discard(self, ref, file_type, options=None):
+        """discard: drop an entry whose shock node is gone"""
+        if not self.max_entries:
+            return
+
+        with self._connect() as conn:
+            conn.execute('DELETE FROM exports WHERE cache_key = ?',
+                         (self._cache_key(ref, file_type, options),))
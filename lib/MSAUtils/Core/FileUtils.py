@@ -1,19 +1,84 @@
+import asyncio
+import gzip
 import logging
+import multiprocessing
 import os
 import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
 
+import requests
 from Bio import AlignIO
 from Bio.Align import MultipleSeqAlignment
 from Bio.Alphabet import generic_dna, generic_protein
 from Bio.Seq import Seq
 from Bio.SeqRecord import SeqRecord
 
+from installed_clients.AsyncDataFileUtilClient import AsyncDataFileUtil
+from installed_clients.AsyncKBaseReportClient import AsyncKBaseReport
 from installed_clients.DataFileUtilClient import DataFileUtil
 from installed_clients.KBaseReportClient import KBaseReport
+from installed_clients.WorkspaceClient import Workspace
+from installed_clients.asyncbaseclient import AsyncBaseClient
+from installed_clients.baseclient import BaseClient, JSONFile
+from MSAUtils.Core.AlignmentMatrix import AlignmentMatrix, msa_data_records
+from MSAUtils.Core.ExportCache import ExportCache
+from MSAUtils.Core.MSAReaders import (detect_compression, fasta_chunks, open_alignment_file,
+                                      read_clustal, read_fasta, read_fasta_chunk,
+                                      read_fasta_mmap, sniff_format)
+from MSAUtils.Core.ObjectCache import ObjectCache
+from MSAUtils.Core.RowSpool import RowSpool
+from MSAUtils.Core.MSAWriters import (write_a2m, write_a3m, write_clustal, write_fasta,
+                                      write_nexus, write_phylip, write_phylip_relaxed,
+                                      write_stockholm, write_unaligned_fasta)
 
 
 class FileUtil:
 
+    # formats parsed without going through Bio.AlignIO
+    FAST_READERS = {'fasta': read_fasta,
+                    'clustal': read_clustal}
+
+    # formats written straight from the workspace object without going through Bio.AlignIO
+    FAST_WRITERS = {'fasta': write_fasta,
+                    'clustal': write_clustal,
+                    'phylip': write_phylip,
+                    'phylip-relaxed': write_phylip_relaxed,
+                    'stockholm': write_stockholm,
+                    'nexus': write_nexus,
+                    'a2m': write_a2m,
+                    'a3m': write_a3m}
+
+    # file name extensions of the formats not named after one
+    FILE_EXTENSIONS = {'unaligned-fasta': 'unaligned.fasta',
+                       'phylip-relaxed': 'phylip'}
+
+    # formats that describe the same layout, for checking a requested format against the file
+    FORMAT_FAMILIES = {'phylip': 'phylip',
+                       'phylip-relaxed': 'phylip',
+                       'phylip-sequential': 'phylip'}
+    SNIFFED_FAMILIES = {'fasta', 'clustal', 'stockholm', 'nexus', 'phylip'}
+
+    # gzip level for exported files, a good size/speed trade-off for alignment text
+    EXPORT_COMPRESSLEVEL = 6
+
+    # most export files rendered at once from one alignment
+    EXPORT_WORKERS = 4
+
+    # objects fetched per get_objects call in a batch export
+    FETCH_BATCH_SIZE = 20
+
+    # a parallel FASTA import splits the file into this many chunks per worker to even out load
+    CHUNKS_PER_WORKER = 4
+
+    # a multi-alignment import is saved once either limit is reached
+    SAVE_BATCH_COUNT = 100
+    SAVE_BATCH_RESIDUES = 50 * 1024 * 1024
+
+    # MSA object fields fetched separately when the alignment itself is streamed
+    STREAMED_OBJECT_FIELDS = ['/sequence_type', '/alignment_length', '/row_order',
+                              '/default_row_labels']
+
     def _validate_import_file_params(self, params):
         """
         _validate_import_matrix_from_excel_params:
@@ -41,61 +106,264 @@ class FileUtil:
 
         return file_path, params['workspace_name'], params['msa_name']
 
-    def _upload_to_shock(self, file_path):
+    def _upload_to_shock(self, file_path, pack='gzip'):
         """
         _upload_to_shock: upload target file to shock using DataFileUtil
+                          pass pack=None for a file that is already compressed
         """
         logging.info('Start uploading file to shock: {}'.format(file_path))
 
         file_to_shock_params = {
             'file_path': file_path,
-            'pack': 'gzip',
             'make_handle': True,
         }
+        if pack:
+            file_to_shock_params['pack'] = pack
         shock_id = self.dfu.file_to_shock(file_to_shock_params)['shock_id']
 
         return shock_id
 
+    def _upload_files_to_shock(self, file_paths):
+        """
+        _upload_files_to_shock: upload already compressed files to shock in one
+                                file_to_shock_mass call, returning their shock ids in order
+        """
+        logging.info('Start uploading {} files to shock'.format(len(file_paths)))
+
+        results = self.dfu.file_to_shock_mass([{'file_path': file_path, 'make_handle': True}
+                                               for file_path in file_paths])
+
+        return [result['shock_id'] for result in results]
+
+    def _shock_node_exists(self, shock_id):
+        """
+        _shock_node_exists: check that a shock node is still there and readable by this user
+        """
+        try:
+            ret = requests.get(f'{self.shock_url}/node/{shock_id}',
+                               headers={'Authorization': f'OAuth {self.token}'}, timeout=30)
+        except requests.RequestException:
+            return False
+
+        return ret.ok
+
+    def _resolve_file_format(self, file_path, file_format):
+        """
+        _resolve_file_format: sniff the file header to fill in file_format 'auto', and reject a
+                              requested format the header clearly contradicts before parsing
+                              A requested format is never swapped for another variant of its
+                              family, e.g. strict PHYLIP for relaxed, as the sniff only guesses
+        """
+        sniffed_format = sniff_format(file_path)
+
+        if file_format == 'auto':
+            if sniffed_format is None:
+                raise ValueError('Unable to detect the format of the alignment file, '
+                                 'please specify file_format')
+            logging.info(f'Detected alignment file format: {sniffed_format}')
+            return sniffed_format
+
+        if sniffed_format is not None:
+            sniffed_family = self.FORMAT_FAMILIES.get(sniffed_format, sniffed_format)
+            family = self.FORMAT_FAMILIES.get(file_format, file_format)
+            if family in self.SNIFFED_FAMILIES and family != sniffed_family:
+                raise ValueError(f'The file looks like {sniffed_format} rather than '
+                                 f'{file_format}, please check file_format')
+
+        return file_format
+
     @staticmethod
-    def _infer_seq_type(msa):
-        dna_set = {"A", "C", "G", "T", "-"}
-        seq_chars = {char for record in msa for char in record.seq}
-        if seq_chars - dna_set:
-            return "protein"
-        else:
-            return "dna"
+    def _parallel_workers(params):
+        """
+        _parallel_workers: the parallel_workers import parameter, capped at the CPU count
+        """
+        workers = params.get('parallel_workers')
+        if workers is None:
+            return 1
+        workers = int(workers)
+        if workers < 1:
+            raise ValueError('parallel_workers must be at least 1')
 
-    def _file_to_data(self, file_path, format='fasta'):
-        """Do the file conversion"""
+        return min(workers, os.cpu_count() or 1)
 
-        data = {'alignment': {},
-                'default_row_labels': {},
-                'row_order': [],
-                }
+    def _parallel_fasta_to_matrix(self, file_path, workers):
+        """
+        _parallel_fasta_to_matrix: parse an uncompressed FASTA file in record-aligned chunks
+                                   across a process pool and merge the chunks back in file order
+        """
+        chunks = fasta_chunks(file_path, workers * self.CHUNKS_PER_WORKER)
+        # imports run on a worker thread of the asyncio path, and forking a multi-threaded
+        # process can deadlock the child, so workers start from a fork server instead
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context('forkserver')) as executor:
+            results = list(executor.map(read_fasta_chunk, repeat(file_path),
+                                        [start for start, _ in chunks],
+                                        [end for _, end in chunks]))
+
+        nucleotide = all(chunk_nucleotide for *_, chunk_nucleotide in results)
+        records = (record
+                   for row_ids, descriptions, sequences, _, _ in results
+                   for record in zip(row_ids, descriptions, sequences))
+
+        return AlignmentMatrix.from_records(records, "dna" if nucleotide else "protein")
+
+    def _file_to_matrix(self, file_path, format='fasta', parallel_workers=1):
+        """
+        _file_to_matrix: read a single alignment file into an AlignmentMatrix
+        """
+        if format == 'fasta' and detect_compression(file_path) is None:
+            if parallel_workers > 1:
+                return self._parallel_fasta_to_matrix(file_path, parallel_workers)
+            # plain FASTA files are scanned in place through mmap
+            return AlignmentMatrix.from_records(read_fasta_mmap(file_path, decode=False))
+
+        with open_alignment_file(file_path) as handle:
+            if format in self.FAST_READERS:
+                return AlignmentMatrix.from_records(self.FAST_READERS[format](handle))
 
-        msa = AlignIO.read(file_path, format)
-        data['alignment_length'] = msa.get_alignment_length()
-        data['sequence_type'] = self._infer_seq_type(msa)
+            msa = AlignIO.read(handle, format)
+            return AlignmentMatrix.from_records(
+                (record.id, record.description, str(record.seq)) for record in msa)
 
-        for record in msa:
-            data['row_order'].append(record.id)
-            data['default_row_labels'][record.id] = record.description
-            data['alignment'][record.id] = str(record.seq)
+    def _file_to_data_iter(self, file_path, format):
+        """
+        _file_to_data_iter: yield the data of each alignment in a multi-alignment file, so only
+                            one alignment is held in memory at a time
+        """
+        with open_alignment_file(file_path) as handle:
+            for msa in AlignIO.parse(handle, format):
+                yield AlignmentMatrix.from_records(
+                    (record.id, record.description, str(record.seq))
+                    for record in msa).to_msa_data()
 
-        message = f'A Multiple Sequence Alignment with {len(data["alignment"])} sequences and ' \
-                  f'an alignment length of {data["alignment_length"]} was produced'
+    def _save_msa_objects(self, workspace_id, objects):
+        """
+        _save_msa_objects: save a list of KBaseTrees.MSA objects and return their references
+        """
+        infos = self.dfu.save_objects({'id': workspace_id, 'objects': objects})
 
-        return data, message
+        return [self._info_to_ref(info) for info in infos]
 
-    def _generate_report(self, msa_ref, workspace_name, message):
+    def _msa_object(self, msa_name, matrix, description):
+        """
+        _msa_object: the save_objects spec of an alignment and the scratch file its data is
+                     streamed from, or None when the data is held in memory
+                     Alignments over stream_save_bytes are written to a scratch file as JSON
+                     one row at a time and the save request body is streamed from it
+        """
+        if matrix.matrix.nbytes <= self.stream_save_bytes:
+            data = matrix.to_msa_data()
+            data['description'] = description
+            return {'type': 'KBaseTrees.MSA', 'name': msa_name, 'data': data}, None
+
+        json_path = os.path.join(self.scratch, f'{msa_name}_{uuid.uuid4()}.json')
+        try:
+            with open(json_path, 'w') as json_file:
+                matrix.write_msa_json(json_file, description=description)
+        except Exception:
+            os.remove(json_path)
+            raise
+        return {'type': 'KBaseTrees.MSA', 'name': msa_name, 'data': JSONFile(json_path)}, json_path
+
+    def _save_msa_matrix(self, workspace_id, msa_name, matrix, description):
+        """
+        _save_msa_matrix: save an alignment as a KBaseTrees.MSA object and return its reference
+        """
+        obj, json_path = self._msa_object(msa_name, matrix, description)
+        try:
+            return self._save_msa_objects(workspace_id, [obj])[0]
+        finally:
+            if json_path:
+                os.remove(json_path)
+
+    def _msa_batches(self, file_path, file_format, msa_name, description):
+        """
+        _msa_batches: yield the save_objects specs of every alignment in the file, named
+                      <msa_name>_<index>, in batches that stop at either save batch limit
+        """
+        batch = []
+        batch_residues = 0
+        for index, data in enumerate(self._file_to_data_iter(file_path, file_format), 1):
+            data['description'] = description
+            batch.append({'type': 'KBaseTrees.MSA',
+                          'name': f'{msa_name}_{index}',
+                          'data': data})
+            batch_residues += len(data['alignment']) * data['alignment_length']
+
+            if len(batch) >= self.SAVE_BATCH_COUNT or batch_residues >= self.SAVE_BATCH_RESIDUES:
+                yield batch
+                batch = []
+                batch_residues = 0
+
+        if batch:
+            yield batch
+
+    @staticmethod
+    def _multiple_alignments_message(obj_refs):
+        if not obj_refs:
+            raise ValueError('No alignments found in file')
+
+        return f'{len(obj_refs)} Multiple Sequence Alignments were imported from the file'
+
+    def _import_multiple_alignments(self, file_path, file_format, workspace_id, msa_name,
+                                    description):
+        """
+        _import_multiple_alignments: save every alignment in the file as its own MSA object,
+                                     named <msa_name>_<index>, in batched save_objects calls
+        """
+        obj_refs = []
+        for batch in self._msa_batches(file_path, file_format, msa_name, description):
+            obj_refs.extend(self._save_msa_objects(workspace_id, batch))
+
+        return obj_refs, self._multiple_alignments_message(obj_refs)
+
+    async def _import_multiple_alignments_async(self, dfu, workspace_id, file_path, file_format,
+                                                msa_name, description):
+        """
+        _import_multiple_alignments_async: _import_multiple_alignments with each batch saved
+                                           while the next one is parsed in a worker thread
+                                           workspace_id is awaited before the first save
+        """
+        loop = asyncio.get_running_loop()
+        batches = self._msa_batches(file_path, file_format, msa_name, description)
+
+        async def save(batch):
+            infos = await dfu.save_objects({'id': await workspace_id, 'objects': batch})
+            return [self._info_to_ref(info) for info in infos]
+
+        obj_refs = []
+        saving = None
+        try:
+            while True:
+                # at most one batch is in flight and one more is held while it saves
+                batch = await loop.run_in_executor(None, next, batches, None)
+                if saving is not None:
+                    obj_refs.extend(await saving)
+                    saving = None
+                if batch is None:
+                    break
+                saving = asyncio.ensure_future(save(batch))
+        finally:
+            if saving is not None:
+                saving.cancel()
+            batches.close()
+
+        return obj_refs, self._multiple_alignments_message(obj_refs)
+
+    @staticmethod
+    def _report_params(msa_refs, workspace_name, message):
+        return {'message': message,
+                'objects_created': [{'ref': msa_ref,
+                                     'description': 'Imported MSA'}
+                                    for msa_ref in msa_refs],
+                'workspace_name': workspace_name,
+                'report_object_name': f'import_msa_file_{uuid.uuid4()}'}
+
+    def _generate_report(self, msa_refs, workspace_name, message):
         """
         _generate_report: generate summary report for upload
         """
-        report_params = {'message': message,
-                         'objects_created': [{'ref': msa_ref,
-                                              'description': 'Imported MSA'}],
-                         'workspace_name': workspace_name,
-                         'report_object_name': f'import_msa_file_{uuid.uuid4()}'}
+        report_params = self._report_params(msa_refs, workspace_name, message)
 
         kbase_report_client = KBaseReport(self.callback_url)
         output = kbase_report_client.create_extended_report(report_params)
@@ -104,76 +372,412 @@ class FileUtil:
 
         return report_output
 
-    def _get_object(self, params):
+    @staticmethod
+    def _export_options(params):
+        """
+        _export_options: the export parameters that change the exported file's content
+        """
+        options = {option: params[option]
+                   for option in ('rows', 'column_range', 'max_gap_fraction', 'min_row_coverage')
+                   if params.get(option) is not None}
+        if params.get('drop_empty_rows'):
+            options['drop_empty_rows'] = True
+
+        for option in ('max_gap_fraction', 'min_row_coverage'):
+            if option in options and not 0 <= float(options[option]) <= 1:
+                raise ValueError(f'{option} must be between 0 and 1')
+
+        return options
+
+    @staticmethod
+    def _column_slice(column_range, alignment_length):
+        """
+        _column_slice: turn a 1-based, inclusive [first, last] column range of an alignment
+                       alignment_length columns long into a slice
+        """
+        if len(column_range) != 2:
+            raise ValueError('column_range must be a [first, last] pair of column numbers')
+        first, last = (int(column) for column in column_range)
+        if first < 1 or last < first:
+            raise ValueError('column_range must satisfy 1 <= first <= last')
+        if last > alignment_length:
+            raise ValueError(f'column_range ends past the alignment length of {alignment_length}')
+
+        return slice(first - 1, last)
+
+    def _write_msa_file(self, obj_data, file_path, file_type, compress=False, options=None):
+        """
+        _write_msa_file: write the alignment of a KBaseTrees.MSA object to file_path in
+                         file_type format, gzipping it on the fly if compress is set
+                         options['column_range'] limits the written columns, each row is sliced
+                         as it is streamed out
+                         options['max_gap_fraction'] and options['min_row_coverage'] drop gappy
+                         columns and rows, see AlignmentMatrix.filter_gaps
+                         options['drop_empty_rows'] drops the rows left empty by an unaligned
+                         export
+        """
+        options = options or {}
+        records = msa_data_records(obj_data)
+        if options.get('column_range'):
+            columns = self._column_slice(options['column_range'],
+                                         obj_data['alignment_length'])
+            records = ((row_id, row_label, sequence[columns])
+                       for row_id, row_label, sequence in records)
+
+        max_gap_fraction = options.get('max_gap_fraction')
+        min_row_coverage = options.get('min_row_coverage')
+        if max_gap_fraction is not None or min_row_coverage is not None:
+            matrix = AlignmentMatrix.from_records(records, obj_data.get('sequence_type'))
+            records = matrix.filter_gaps(
+                None if max_gap_fraction is None else float(max_gap_fraction),
+                None if min_row_coverage is None else float(min_row_coverage)).records()
+
+        if compress:
+            handle = gzip.open(file_path, 'wt', compresslevel=self.EXPORT_COMPRESSLEVEL)
+        else:
+            handle = open(file_path, 'w')
+
+        with handle:
+            if file_type == 'unaligned-fasta':
+                write_unaligned_fasta(handle, records, bool(options.get('drop_empty_rows')))
+            elif file_type == 'nexus':
+                # the object's sequence type spares write_nexus a scan of every row
+                write_nexus(handle, records, obj_data.get('sequence_type'))
+            elif file_type in self.FAST_WRITERS:
+                self.FAST_WRITERS[file_type](handle, records)
+            else:
+                matrix = AlignmentMatrix.from_records(records, obj_data.get('sequence_type'))
+                seq_type = generic_protein if matrix.sequence_type == "protein" else generic_dna
+
+                msa = MultipleSeqAlignment(
+                    [SeqRecord(Seq(sequence, seq_type), id=row_id, description=row_label)
+                     for row_id, row_label, sequence in matrix.records()])
+                AlignIO.write(msa, handle, file_type)
+
+    def _file_name(self, obj_name, file_type):
+        return f'{obj_name}.{self.FILE_EXTENSIONS.get(file_type, file_type)}'
+
+    @staticmethod
+    def _info_to_ref(info):
+        return f"{info[6]}/{info[0]}/{info[4]}"
+
+    @staticmethod
+    def _select_rows(obj_name, obj_data, rows):
+        """
+        _select_rows: keep only the requested rows of an MSA object's data, in the given order
+        """
+        missing = [row_id for row_id in rows if row_id not in obj_data['alignment']]
+        if missing:
+            raise ValueError(f'Rows not found in the alignment: {", ".join(missing)}')
+
+        row_labels = obj_data.get('default_row_labels', {})
+        data = {key: value for key, value in obj_data.items()
+                if key not in ('alignment', 'default_row_labels', 'row_order')}
+        data['alignment'] = {row_id: obj_data['alignment'][row_id] for row_id in rows}
+        data['default_row_labels'] = {row_id: row_labels[row_id] for row_id in rows
+                                      if row_id in row_labels}
+        data['row_order'] = list(rows)
+
+        return obj_name, data
+
+    def _get_object_rows(self, input_ref, rows):
+        """
+        _get_object_rows: fetch only the requested rows of an MSA object with workspace
+                          included paths, so the rest of the alignment is never transferred
+        """
+        # object paths escape '~' and '/' in keys, as in JSON pointers
+        keys = [row_id.replace('~', '~0').replace('/', '~1') for row_id in rows]
+        included = ['/sequence_type', '/alignment_length']
+        included += [f'/alignment/{key}' for key in keys]
+        included += [f'/default_row_labels/{key}' for key in keys]
+
+        ret = self.ws.get_objects2(
+            {'objects': [{'ref': input_ref, 'included': included}]})['data'][0]
+
+        return self._select_rows(ret['info'][1], ret['data'], rows)
+
+    def _stream_object(self, input_ref, spool):
+        """
+        _stream_object: fetch an MSA object with its alignment streamed into spool row by row,
+                        so neither the response body nor the alignment is ever held in memory
+        """
+        ret = self.ws.get_objects2(
+            {'objects': [{'ref': input_ref, 'included': self.STREAMED_OBJECT_FIELDS}]}
+        )['data'][0]
+
+        rows = self.ws_stream.call_method_iter(
+            'Workspace.get_objects2',
+            [{'objects': [{'ref': input_ref, 'included': ['/alignment']}]}],
+            'result.item.data.item.data.alignment')
+        for row_id, sequence in rows:
+            spool.add(row_id, sequence)
+
+        obj_data = ret['data']
+        obj_data['alignment'] = spool
+
+        return ret['info'][1], obj_data
+
+    def _get_object(self, params, spool=None):
+        """
+        _get_object: the name and data of the MSA object at params['input_ref']
+                     Objects over stream_object_bytes have their alignment streamed into spool
+                     if one is given, rather than being fetched and cached whole
+        """
+        rows = params.get('rows')
+        versioned_ref = None
+        info = None
+        if self.object_cache.max_bytes or spool is not None:
+            # resolving the reference also checks that this user may still read the object
+            info = self.ws.get_object_info3(
+                {'objects': [{'ref': params['input_ref']}]})['infos'][0]
+            versioned_ref = self._info_to_ref(info)
+            cached = self.object_cache.get(versioned_ref)
+            if cached:
+                logging.info(f'Using cached copy of {versioned_ref}')
+                return self._select_rows(*cached, rows) if rows else cached
+
+        if rows:
+            return self._get_object_rows(params['input_ref'], rows)
+
+        if spool is not None and info[9] > self.stream_object_bytes:
+            logging.info(f'Streaming the alignment of {versioned_ref} ({info[9]} bytes)')
+            return self._stream_object(versioned_ref, spool)
+
         ret = self.dfu.get_objects(
             {'object_refs': [params['input_ref']]}
         )['data'][0]
         obj_name = ret['info'][1]
         obj_data = ret['data']
+
+        if self.object_cache.max_bytes:
+            self.object_cache.put(self._info_to_ref(ret['info']), obj_name, obj_data,
+                                  ret['info'][9])
+
         return obj_name, obj_data
 
     def __init__(self, config):
         self.callback_url = config['SDK_CALLBACK_URL']
         self.scratch = config['scratch']
         self.token = config['KB_AUTH_TOKEN']
+        self.shock_url = config.get('shock-url')
         self.dfu = DataFileUtil(self.callback_url)
+        self.ws = Workspace(config['workspace-url'], token=self.token)
+        # for workspace calls whose responses are parsed as they arrive
+        self.ws_stream = BaseClient(config['workspace-url'], token=self.token)
+        self.stream_object_bytes = int(config.get('stream-object-bytes', 256 * 1024 ** 2))
+        self.stream_save_bytes = int(config.get('stream-save-bytes', 256 * 1024 ** 2))
+        # imports run on the asyncio clients when aiohttp is installed, unless turned off
+        self.async_import = str(config.get('async-import', 'true')).lower() != 'false'
+        # the export cache only pays off across jobs, so it is off unless given a shared directory
+        export_cache_dir = config.get('export-cache-dir')
+        self.export_cache = ExportCache(
+            export_cache_dir,
+            max_entries=(int(config.get('export-cache-max-entries', 10000))
+                         if export_cache_dir else 0),
+            ttl=int(config.get('export-cache-ttl', 7 * 24 * 3600)))
+        # so is the object cache
+        object_cache_dir = config.get('object-cache-dir')
+        self.object_cache = ObjectCache(
+            object_cache_dir,
+            max_bytes=(int(config.get('object-cache-max-bytes', 1024 ** 3))
+                       if object_cache_dir else 0),
+            max_object_bytes=int(config.get('object-cache-max-object-bytes', 64 * 1024 ** 2)))
 
     def import_fasta_file(self, params):
+        if self.async_import and AsyncBaseClient.available():
+            return asyncio.run(self.import_fasta_file_async(params))
 
         file_path, workspace_name, msa_name = self._validate_import_file_params(params)
+        file_format = self._resolve_file_format(file_path, params.get('file_format', 'fasta'))
+        parallel_workers = self._parallel_workers(params)
 
         if not isinstance(workspace_name, int):
             workspace_id = self.dfu.ws_name_to_id(workspace_name)
         else:
             workspace_id = workspace_name
 
-        data, message = self._file_to_data(file_path, params.get('file_format', 'fasta'))
-        data['description'] = params.get('description', '')
+        if params.get('multiple_alignments'):
+            obj_refs, message = self._import_multiple_alignments(
+                file_path, file_format, workspace_id, msa_name, params.get('description', ''))
+        else:
+            matrix = self._file_to_matrix(file_path, file_format, parallel_workers)
+            message = f'A Multiple Sequence Alignment with {len(matrix)} sequences and ' \
+                      f'an alignment length of {matrix.alignment_length} was produced'
 
-        info = self.dfu.save_objects({
-            'id': workspace_id,
-            'objects': [
-                {'type': 'KBaseTrees.MSA',
-                 'name': msa_name,
-                 'data': data}]
-        })[0]
-        obj_ref = f"{info[6]}/{info[0]}/{info[4]}"
+            obj_refs = [self._save_msa_matrix(workspace_id, msa_name, matrix,
+                                              params.get('description', ''))]
 
-        returnVal = {'msa_obj_ref': obj_ref}
+        returnVal = {'msa_obj_ref': obj_refs[0], 'msa_obj_refs': obj_refs}
 
-        report_output = self._generate_report(obj_ref, workspace_name, message)
+        report_output = self._generate_report(obj_refs, workspace_name, message)
 
         returnVal.update(report_output)
 
         return returnVal
 
-    def msa_to_file(self, params, file_type='fasta'):
+    async def import_fasta_file_async(self, params):
+        """
+        import_fasta_file_async: import_fasta_file on the asyncio clients, resolving the
+                                 workspace name while the file is parsed and saving batches of
+                                 a multi-alignment file while the next batch is parsed
+        """
+        file_path, workspace_name, msa_name = self._validate_import_file_params(params)
+        file_format = self._resolve_file_format(file_path, params.get('file_format', 'fasta'))
+        parallel_workers = self._parallel_workers(params)
+        description = params.get('description', '')
+        loop = asyncio.get_running_loop()
+
+        async with AsyncDataFileUtil(self.callback_url) as dfu, \
+                AsyncKBaseReport(self.callback_url) as kbase_report_client:
+            if not isinstance(workspace_name, int):
+                workspace_id = asyncio.ensure_future(dfu.ws_name_to_id(workspace_name))
+            else:
+                workspace_id = loop.create_future()
+                workspace_id.set_result(workspace_name)
+
+            try:
+                if params.get('multiple_alignments'):
+                    obj_refs, message = await self._import_multiple_alignments_async(
+                        dfu, workspace_id, file_path, file_format, msa_name, description)
+                else:
+                    matrix = await loop.run_in_executor(
+                        None, self._file_to_matrix, file_path, file_format, parallel_workers)
+                    message = f'A Multiple Sequence Alignment with {len(matrix)} sequences ' \
+                              f'and an alignment length of {matrix.alignment_length} was produced'
+
+                    obj, json_path = await loop.run_in_executor(
+                        None, self._msa_object, msa_name, matrix, description)
+                    del matrix
+                    try:
+                        infos = await dfu.save_objects({'id': await workspace_id,
+                                                        'objects': [obj]})
+                    finally:
+                        if json_path:
+                            os.remove(json_path)
+                    obj_refs = [self._info_to_ref(infos[0])]
+            finally:
+                workspace_id.cancel()
+
+            output = await kbase_report_client.create_extended_report(
+                self._report_params(obj_refs, workspace_name, message))
+
+        return {'msa_obj_ref': obj_refs[0],
+                'msa_obj_refs': obj_refs,
+                'report_name': output['name'],
+                'report_ref': output['ref']}
+
+    def msa_to_file(self, params, file_type='fasta', compress=False):
         if "input_ref" not in params:
             raise ValueError("input_ref not in supplied params")
         if "destination_dir" not in params:
             raise ValueError("destination_dir not in supplied params")
 
-        obj_name, obj_data = self._get_object(params)
-        keys = obj_data.get('row_order', obj_data['alignment'].keys)
-        row_labels = obj_data.get('default_row_labels', {})
-        file_path = os.path.join(self.scratch, f'{obj_name}.{file_type}')
-        seq_type = generic_protein if obj_data.get('sequence_type') == "protein" else generic_dna
+        with RowSpool(self.scratch) as spool:
+            obj_name, obj_data = self._get_object(params, spool)
+            file_path = os.path.join(self.scratch, self._file_name(obj_name, file_type))
+            if compress:
+                file_path += '.gz'
 
-        msa = MultipleSeqAlignment(
-            [SeqRecord(Seq(obj_data['alignment'][key], seq_type),
-                       id=key, description=row_labels[key])
-             for key in keys])
-        AlignIO.write(msa, file_path, file_type)
+            self._write_msa_file(obj_data, file_path, file_type, compress,
+                                 self._export_options(params))
 
         return {'file_path': file_path}
 
-    def msa_to_clustal_file(self, params):
-        raise NotImplementedError
-
     def export_file(self, params, file_type='fasta'):
+        input_ref = params.get('input_ref', '')
+        options = self._export_options(params)
+        if self.export_cache.max_entries and input_ref:
+            # the cache is keyed by ws/obj/ver, so names and unversioned refs are resolved first
+            input_ref = self._info_to_ref(self.ws.get_object_info3(
+                {'objects': [{'ref': input_ref}]})['infos'][0])
+            params['input_ref'] = input_ref
+        shock_id = self.export_cache.get(input_ref, file_type, options)
+        if shock_id:
+            if self._shock_node_exists(shock_id):
+                logging.info(f'Reusing export of {input_ref} in shock node {shock_id}')
+                return {'shock_id': shock_id}
+            self.export_cache.discard(input_ref, file_type, options)
+
         params['destination_dir'] = os.path.join(self.scratch, str(uuid.uuid4()))
         os.mkdir(params['destination_dir'])
 
-        file_path = self.msa_to_file(params, file_type)['file_path']
+        # the file is gzipped while it is written, so DataFileUtil does not need to repack it
+        file_path = self.msa_to_file(params, file_type, compress=True)['file_path']
+        shock_id = self._upload_to_shock(file_path, pack=None)
+        self.export_cache.put(input_ref, file_type, options, shock_id)
 
-        return {'shock_id': self._upload_to_shock(file_path)}
+        return {'shock_id': shock_id}
+
+    def export_files(self, params):
+        if "input_ref" not in params:
+            raise ValueError("input_ref not in supplied params")
+        if not params.get("formats"):
+            raise ValueError("formats not in supplied params")
+
+        file_types = list(dict.fromkeys(params['formats']))
+        options = self._export_options(params)
+        export_dir = os.path.join(self.scratch, str(uuid.uuid4()))
+        os.mkdir(export_dir)
+
+        with RowSpool(self.scratch) as spool:
+            obj_name, obj_data = self._get_object(params, spool)
+            # one directory per format, as phylip and phylip-relaxed share a file name
+            file_paths = []
+            for file_type in file_types:
+                os.mkdir(os.path.join(export_dir, file_type))
+                file_paths.append(os.path.join(export_dir, file_type,
+                                               self._file_name(obj_name, file_type) + '.gz'))
+
+            # every format is rendered from the one fetched object, in parallel writer threads
+            with ThreadPoolExecutor(
+                    max_workers=min(len(file_types), self.EXPORT_WORKERS)) as executor:
+                list(executor.map(lambda file_path, file_type:
+                                  self._write_msa_file(obj_data, file_path, file_type,
+                                                       compress=True, options=options),
+                                  file_paths, file_types))
+
+        shock_ids = self._upload_files_to_shock(file_paths)
+
+        return {'shock_ids': dict(zip(file_types, shock_ids))}
+
+    def export_batch(self, params):
+        if not params.get("input_refs"):
+            raise ValueError("input_refs not in supplied params")
+        if not params.get("format"):
+            raise ValueError("format not in supplied params")
+
+        file_type = params['format']
+        input_refs = list(dict.fromkeys(params['input_refs']))
+        export_dir = os.path.join(self.scratch, str(uuid.uuid4()))
+        os.mkdir(export_dir)
+
+        file_paths = []
+        pending = []
+        with ThreadPoolExecutor(max_workers=self.EXPORT_WORKERS) as executor:
+            for start in range(0, len(input_refs), self.FETCH_BATCH_SIZE):
+                batch_refs = input_refs[start:start + self.FETCH_BATCH_SIZE]
+                objects = self.dfu.get_objects({'object_refs': batch_refs})['data']
+
+                # format this batch while the next one is fetched, holding at most two batches
+                futures = []
+                for index, obj in enumerate(objects, start):
+                    # one directory per object keeps shock file names as <obj_name>.<format>.gz
+                    file_dir = os.path.join(export_dir, str(index))
+                    os.mkdir(file_dir)
+                    file_path = os.path.join(file_dir,
+                                             self._file_name(obj['info'][1], file_type) + '.gz')
+                    file_paths.append(file_path)
+                    futures.append(executor.submit(self._write_msa_file, obj['data'], file_path,
+                                                   file_type, compress=True))
+                del objects
+
+                for future in pending:
+                    future.result()
+                pending = futures
+
+            for future in pending:
+                future.result()
+
+        shock_ids = self._upload_files_to_shock(file_paths)
+
+        return {'shock_ids': dict(zip(input_refs, shock_ids))}
@@ -0,0 +1,322 @@
+"""
+Lightweight readers for multiple sequence alignment files.
+
+Each reader takes an open text handle and yields one (row_id, description, sequence) tuple
+per alignment row, in file order, without building any Biopython objects. The records match
+what Bio.AlignIO would report for the same file (SeqRecord.id, .description and str(.seq)).
+"""
+import bz2
+import gzip
+import io
+import lzma
+import mmap
+import os
+import re
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# DNA/RNA bases, IUPAC ambiguity codes and gap characters, in either case
+NUCLEOTIDE_BYTES = b'ACGTURYSWKMBDHVNacgturyswkmbdhvn-.'
+
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+COMPRESSION_MAGIC = ((b'\x1f\x8b', 'gzip'),
+                     (b'BZh', 'bz2'),
+                     (b'\xfd7zXZ\x00', 'xz'),
+                     (ZSTD_MAGIC, 'zstd'))
+
+
+def is_nucleotide_sequence(sequence):
+    """
+    is_nucleotide_sequence: True if every character of the sequence is a nucleotide code or a gap
+
+    The check deletes every nucleotide byte with one bytes.translate call and looks for leftovers.
+    """
+    if isinstance(sequence, str):
+        sequence = sequence.encode()
+
+    return not sequence.translate(None, NUCLEOTIDE_BYTES)
+
+
+def detect_compression(file_path):
+    """
+    detect_compression: return 'gzip', 'bz2', 'xz' or 'zstd' from the file's magic bytes, or
+                        None for an uncompressed file
+    """
+    with open(file_path, 'rb') as f:
+        magic = f.read(6)
+
+    for prefix, compression in COMPRESSION_MAGIC:
+        if magic.startswith(prefix):
+            return compression
+
+    return None
+
+
+def open_alignment_file(file_path):
+    """
+    open_alignment_file: open an alignment file as a text handle, decompressing it on the fly
+                         if it is gzip, bz2, xz or zstd compressed
+    """
+    compression = detect_compression(file_path)
+    if compression == 'gzip':
+        return gzip.open(file_path, 'rt')
+    if compression == 'bz2':
+        return bz2.open(file_path, 'rt')
+    if compression == 'xz':
+        return lzma.open(file_path, 'rt')
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ValueError('zstd compressed input requires the zstandard package')
+        stream = zstandard.ZstdDecompressor().stream_reader(open(file_path, 'rb'),
+                                                            read_across_frames=True)
+        return io.TextIOWrapper(stream)
+
+    return open(file_path, 'r')
+
+
+def read_fasta(handle):
+    """
+    read_fasta: stream the records of an aligned FASTA file
+
+    Text before the first '>' line is ignored, the first word of the title is the row id
+    and the full title is the description, as in Bio.SeqIO.FastaIO.
+    """
+    title = None
+    lines = []
+    for line in handle:
+        if line[0:1] == '>':
+            if title is not None:
+                yield _fasta_record(title, lines)
+            title = line[1:].rstrip()
+            lines = []
+        elif title is not None:
+            lines.append(line.rstrip())
+
+    if title is not None:
+        yield _fasta_record(title, lines)
+
+
+SNIFF_SIZE = 4096
+
+# characters a PHYLIP row may hold after its name
+PHYLIP_RESIDUES = re.compile(r'[A-Za-z*?~.-]*')
+
+
+def sniff_format(file_path):
+    """
+    sniff_format: guess the alignment format from the first few KB of the (decompressed) file
+
+    Returns 'fasta', 'clustal', 'stockholm', 'nexus', 'phylip' or 'phylip-relaxed', or None
+    if the header matches none of them. For PHYLIP the first block of rows is read both ways,
+    see _phylip_variant, and None is returned when that does not settle which variant it is.
+    """
+    with open_alignment_file(file_path) as handle:
+        lines = handle.read(SNIFF_SIZE).splitlines()
+
+    lines = [line for line in lines if line.strip()]
+    if not lines:
+        return None
+
+    first_line = lines[0].lstrip()
+    if first_line.startswith('>'):
+        return 'fasta'
+    if first_line.startswith(CLUSTAL_HEADERS):
+        return 'clustal'
+    if first_line.startswith('# STOCKHOLM'):
+        return 'stockholm'
+    if first_line.upper().startswith('#NEXUS'):
+        return 'nexus'
+
+    counts = first_line.split()
+    if len(counts) >= 2 and counts[0].isdigit() and counts[1].isdigit():
+        return _phylip_variant(lines[1:1 + int(counts[0])], int(counts[1]))
+
+    return None
+
+
+def _phylip_variant(rows, alignment_length):
+    """
+    _phylip_variant: 'phylip' or 'phylip-relaxed' for the first block of rows of a PHYLIP file,
+                     or None if it cannot tell
+
+    Strict PHYLIP names fill the first 10 columns, relaxed names end at the first whitespace.
+    A reading fits when every row then holds the same number of residue characters, at most
+    the header's alignment length, and a reading that holds the whole alignment length is
+    preferred.
+    """
+    if not rows:
+        return None
+    readings = {'phylip': [''.join(row[10:].split()) for row in rows],
+                'phylip-relaxed': [''.join(row.split()[1:]) for row in rows]}
+    if readings['phylip'] == readings['phylip-relaxed']:
+        # both readings give the same residues, so the strict parser reads it correctly
+        return 'phylip'
+
+    fitting = {}
+    for variant, residues in readings.items():
+        counts = {len(row) for row in residues}
+        count = counts.pop()
+        # the tail of a long name read as residues usually brings in digits or punctuation
+        if (not counts and 0 < count <= alignment_length and
+                all(PHYLIP_RESIDUES.fullmatch(row) for row in residues)):
+            fitting[variant] = count
+    complete = [variant for variant, count in fitting.items() if count == alignment_length]
+    if len(complete) == 1:
+        return complete[0]
+    if len(fitting) == 1:
+        return next(iter(fitting))
+
+    return None
+
+
+# bytes removed from FASTA sequence lines, in a single bytes.translate pass per record
+FASTA_WHITESPACE = b' \t\r\n\x0b\x0c'
+
+
+def read_fasta_mmap(file_path, start=0, end=None, decode=True):
+    """
+    read_fasta_mmap: stream the records of an uncompressed aligned FASTA file through mmap
+
+    Record boundaries are found with mmap.find, which scans in C, and each record's sequence
+    is sliced out of the map and stripped of line breaks with one bytes.translate call before
+    it is decoded. Yields the same records as read_fasta. start and end restrict the scan to
+    the records between two byte offsets, see fasta_chunks. With decode=False sequences are
+    yielded as bytes, for AlignmentMatrix.from_records to copy straight into its buffer.
+    """
+    with open(file_path, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from _scan_fasta(mm, start, len(mm) if end is None else end, decode)
+
+
+def _scan_fasta(mm, start, end, decode=True):
+    if mm[start:start + 1] != b'>':
+        start = mm.find(b'\n>', start, end)
+        if start == -1:
+            return
+        start += 1
+
+    while start < end:
+        header_end = mm.find(b'\n', start, end)
+        if header_end == -1:
+            header_end = end
+        next_start = mm.find(b'\n>', header_end, end)
+        seq_end = end if next_start == -1 else next_start
+
+        title = mm[start + 1:header_end].decode().rstrip()
+        sequence = mm[header_end:seq_end].translate(None, FASTA_WHITESPACE)
+        if decode:
+            sequence = sequence.decode()
+        words = title.split(None, 1)
+        yield (words[0] if words else ''), title, sequence
+
+        if next_start == -1:
+            break
+        start = next_start + 1
+
+
+def fasta_chunks(file_path, count):
+    """
+    fasta_chunks: split an uncompressed FASTA file into at most count (start, end) byte ranges
+                  of roughly equal size that each begin at a record boundary
+    """
+    size = os.path.getsize(file_path)
+    if not size:
+        return []
+
+    offsets = [0]
+    with open(file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for index in range(1, count):
+                boundary = mm.find(b'\n>', max(size * index // count, offsets[-1]))
+                if boundary == -1:
+                    break
+                offsets.append(boundary + 1)
+    offsets.append(size)
+
+    return list(zip(offsets[:-1], offsets[1:]))
+
+
+def read_fasta_chunk(file_path, start, end):
+    """
+    read_fasta_chunk: parse the records of one fasta_chunks range, for use in a worker process
+
+    Returns (row_ids, descriptions, sequences, alignment_length, nucleotide), where sequences
+    are bytes and nucleotide is False once any of the chunk's sequences holds a non-nucleotide
+    character.
+    """
+    row_ids = []
+    descriptions = []
+    sequences = []
+    alignment_length = None
+    nucleotide = True
+    for row_id, description, sequence in read_fasta_mmap(file_path, start, end, decode=False):
+        if alignment_length is None:
+            alignment_length = len(sequence)
+        elif len(sequence) != alignment_length:
+            raise ValueError('Sequences must all be the same length')
+        nucleotide = nucleotide and is_nucleotide_sequence(sequence)
+        row_ids.append(row_id)
+        descriptions.append(description)
+        sequences.append(sequence)
+
+    return row_ids, descriptions, sequences, alignment_length, nucleotide
+
+
+def _fasta_record(title, lines):
+    words = title.split(None, 1)
+    row_id = words[0] if words else ''
+    sequence = ''.join(lines).replace(' ', '').replace('\r', '')
+    return row_id, title, sequence
+
+
+CLUSTAL_HEADERS = ('CLUSTAL', 'PROBCONS', 'MUSCLE', 'MSAPROBS', 'Kalign', 'Biopython')
+
+
+def read_clustal(handle):
+    """
+    read_clustal: read the rows of an interleaved Clustal file
+
+    Each block's fragments are appended to a per-row buffer and every row is joined once
+    after the last block. Conservation lines start with whitespace and are skipped on their
+    first character. Only the first alignment of the file is read.
+    """
+    header = handle.readline()
+    if not header.startswith(CLUSTAL_HEADERS):
+        raise ValueError(f'{header.strip()!r} is not a known CLUSTAL header')
+
+    row_ids = []
+    fragments = []
+    row = 0
+    first_block = True
+    for line in handle:
+        if line[0] in ' \t\r\n':
+            # blank separator or conservation line: the next row line starts a new block
+            if row:
+                first_block = False
+                row = 0
+            continue
+        if line.startswith(CLUSTAL_HEADERS):
+            break
+
+        fields = line.split()
+        if len(fields) not in (2, 3):
+            raise ValueError(f'Could not parse line:\n{line}')
+
+        if first_block:
+            row_ids.append(fields[0])
+            fragments.append([fields[1]])
+        elif row < len(row_ids) and fields[0] == row_ids[row]:
+            fragments[row].append(fields[1])
+        else:
+            expected = row_ids[row] if row < len(row_ids) else None
+            raise ValueError(f'Identifiers out of order? Got {fields[0]!r} '
+                             f'but expected {expected!r}')
+        row += 1
+
+    for row_id, row_fragments in zip(row_ids, fragments):
+        yield row_id, row_id, ''.join(row_fragments)
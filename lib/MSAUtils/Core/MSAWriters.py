@@ -0,0 +1,267 @@
+"""
+Streaming writers for multiple sequence alignment files.
+
+Each writer takes an open text handle and (row_id, row_label, sequence) records, such as
+AlignmentMatrix.records() or rows walked straight out of a KBaseTrees.MSA data dict, and writes
+the formatted file without building Biopython objects. Interleaved formats pad the row names
+once and write every block line as a padded name plus a slice of the row, so writing takes
+time linear in the size of the output.
+
+The FASTA, Clustal and PHYLIP output is byte for byte what Bio.AlignIO.write produces for the
+same alignment.
+"""
+import string
+
+import numpy as np
+
+from MSAUtils.Core.MSAReaders import is_nucleotide_sequence
+
+FASTA_WRAP = 60
+CLUSTAL_BLOCK = 50
+CLUSTAL_NAME_WIDTH = 36
+PHYLIP_BLOCK = 50
+PHYLIP_CHUNK = 10
+PHYLIP_NAME_WIDTH = 10
+NEXUS_BLOCK = 60
+
+# characters that make a NEXUS name need quoting
+NEXUS_PUNCTUATION = set(string.whitespace + '()[]{}/\\,;:=*\'"`+-<>')
+
+# str.translate table deleting gap characters
+GAP_DELETE = str.maketrans('', '', '-.')
+
+# byte tables for A2M/A3M: residues in insert columns are lowercase, their gaps are dots
+UPPER_TABLE = np.frombuffer(bytes.maketrans(b'abcdefghijklmnopqrstuvwxyz.',
+                                            b'ABCDEFGHIJKLMNOPQRSTUVWXYZ-'), dtype=np.uint8)
+INSERT_TABLE = np.frombuffer(bytes.maketrans(b'ABCDEFGHIJKLMNOPQRSTUVWXYZ-',
+                                             b'abcdefghijklmnopqrstuvwxyz.'), dtype=np.uint8)
+
+
+def _clean_title(text):
+    return text.replace('\n', ' ').replace('\r', ' ')
+
+
+def fasta_title(row_id, row_label):
+    """
+    fasta_title: the FASTA title line for a row, as Bio.SeqIO.FastaIO.FastaWriter builds it
+    """
+    row_id = _clean_title(row_id)
+    row_label = _clean_title(row_label)
+    if row_label and row_label.split(None, 1)[0] == row_id:
+        return row_label
+    if row_label:
+        return f'{row_id} {row_label}'
+    return row_id
+
+
+def write_fasta(handle, records, wrap=FASTA_WRAP):
+    """
+    write_fasta: write records as FASTA, wrapping sequences at wrap characters
+    """
+    alignment_length = None
+    for row_id, row_label, sequence in records:
+        if alignment_length is None:
+            alignment_length = len(sequence)
+        elif len(sequence) != alignment_length:
+            raise ValueError('Sequences must all be the same length')
+
+        lines = [f'>{fasta_title(row_id, row_label)}']
+        lines.extend(sequence[i:i + wrap] for i in range(0, len(sequence), wrap))
+        lines.append('')
+        handle.write('\n'.join(lines))
+
+
+def _collect_rows(records):
+    """
+    _collect_rows: the records as a list, checking the alignment is non-empty and rectangular
+    """
+    rows = list(records)
+    if not rows:
+        raise ValueError('Must have at least one sequence')
+
+    alignment_length = len(rows[0][2])
+    if any(len(sequence) != alignment_length for _, _, sequence in rows):
+        raise ValueError('Sequences must all be the same length')
+    if not alignment_length:
+        raise ValueError('Non-empty sequences are required')
+
+    return rows, alignment_length
+
+
+def write_clustal(handle, records):
+    """
+    write_clustal: write records as a Clustal X file in blocks of 50 columns
+    """
+    rows, alignment_length = _collect_rows(records)
+    rows = [(row_id[0:30].replace(' ', '_').ljust(CLUSTAL_NAME_WIDTH), sequence)
+            for row_id, _, sequence in rows]
+
+    handle.write('CLUSTAL X (1.81) multiple sequence alignment\n\n\n')
+    for start in range(0, alignment_length, CLUSTAL_BLOCK):
+        end = start + CLUSTAL_BLOCK
+        handle.write(''.join(f'{name}{sequence[start:end]}\n' for name, sequence in rows))
+        handle.write('\n')
+    handle.write('\n')
+
+
+def _phylip_name(row_id, width):
+    name = row_id.strip()
+    for char in '[](),':
+        name = name.replace(char, '')
+    for char in ':;':
+        name = name.replace(char, '|')
+    return name[:width]
+
+
+def write_phylip(handle, records, relaxed=False):
+    """
+    write_phylip: write records as interleaved PHYLIP, in blocks of 50 columns split into chunks
+                  of 10
+
+    Strict PHYLIP truncates names to 10 characters, relaxed PHYLIP pads them to the longest
+    name plus one and does not allow whitespace in them.
+    """
+    rows, alignment_length = _collect_rows(records)
+
+    if relaxed:
+        for row_id, _, _ in rows:
+            if any(char in string.whitespace for char in row_id.strip()):
+                raise ValueError(f'Whitespace not allowed in identifier: {row_id.strip()}')
+        width = max(len(row_id.strip()) for row_id, _, _ in rows) + 1
+    else:
+        width = PHYLIP_NAME_WIDTH
+
+    names = []
+    seen = set()
+    for row_id, _, sequence in rows:
+        name = _phylip_name(row_id, width)
+        if name in seen:
+            raise ValueError(f'Repeated name {name!r} (originally {row_id!r}), '
+                             f'possibly due to truncation')
+        if '.' in sequence:
+            raise ValueError('PHYLIP format no longer allows dots in sequence')
+        seen.add(name)
+        names.append(name.ljust(width))
+    indent = ' ' * width
+
+    # each row is spaced into chunks once and every block line is a slice of that; like
+    # Bio.AlignIO a row whose length is a multiple of 10 but not of 50 ends with an empty chunk
+    chunk_starts = range(0, alignment_length, PHYLIP_CHUNK)
+    empty_chunk = []
+    if not alignment_length % PHYLIP_CHUNK and alignment_length % PHYLIP_BLOCK:
+        empty_chunk = ['']
+    line_width = PHYLIP_BLOCK // PHYLIP_CHUNK * (PHYLIP_CHUNK + 1)
+    spaced_rows = [' ' + ' '.join([sequence[start:start + PHYLIP_CHUNK]
+                                   for start in chunk_starts] + empty_chunk)
+                   for _, _, sequence in rows]
+
+    handle.write(f' {len(rows)} {alignment_length}\n')
+    for block, line_start in enumerate(range(0, len(spaced_rows[0]), line_width)):
+        line_end = line_start + line_width
+        if block:
+            handle.write('\n')
+        handle.write(''.join(f'{indent if block else name}{spaced[line_start:line_end]}\n'
+                             for name, spaced in zip(names, spaced_rows)))
+
+
+def write_phylip_relaxed(handle, records):
+    """write_phylip_relaxed: write records as interleaved relaxed PHYLIP"""
+    write_phylip(handle, records, relaxed=True)
+
+
+def write_stockholm(handle, records):
+    """
+    write_stockholm: write records as a single-block Stockholm file, with each row's label
+                     in a #=GS DE line
+    """
+    rows, _ = _collect_rows(records)
+    names = [row_id.replace(' ', '_') for row_id, _, _ in rows]
+    if len(set(names)) != len(names):
+        raise ValueError('Duplicate record identifiers are not allowed in Stockholm files')
+    width = max(len(name) for name in names) + 1
+
+    handle.write(f'# STOCKHOLM 1.0\n#=GF SQ {len(rows)}\n')
+    handle.write(''.join(f'#=GS {name.ljust(width)}DE {_clean_title(row_label)}\n'
+                         for name, (row_id, row_label, _) in zip(names, rows)
+                         if row_label and row_label != row_id))
+    handle.write(''.join(f'{name.ljust(width)}{sequence}\n'
+                         for name, (_, _, sequence) in zip(names, rows)))
+    handle.write('//\n')
+
+
+def _nexus_name(row_id):
+    if not row_id or NEXUS_PUNCTUATION.intersection(row_id):
+        return "'" + row_id.replace("'", "''") + "'"
+    return row_id
+
+
+def write_nexus(handle, records, sequence_type=None):
+    """
+    write_nexus: write records as an interleaved NEXUS data block, in blocks of 60 columns
+                 The datatype is taken from the rows when sequence_type is not given
+    """
+    rows, alignment_length = _collect_rows(records)
+    if sequence_type is None:
+        nucleotide = all(is_nucleotide_sequence(sequence) for _, _, sequence in rows)
+        sequence_type = 'dna' if nucleotide else 'protein'
+    names = [_nexus_name(row_id) for row_id, _, _ in rows]
+    width = max(len(name) for name in names) + 1
+    names = [name.ljust(width) for name in names]
+    datatype = 'protein' if sequence_type == 'protein' else 'dna'
+
+    handle.write(f'#NEXUS\nbegin data;\n'
+                 f'dimensions ntax={len(rows)} nchar={alignment_length};\n'
+                 f'format datatype={datatype} missing=? gap=- interleave;\nmatrix\n')
+    for start in range(0, alignment_length, NEXUS_BLOCK):
+        end = start + NEXUS_BLOCK
+        if start:
+            handle.write('\n')
+        handle.write(''.join(f'{name}{sequence[start:end]}\n'
+                             for name, (_, _, sequence) in zip(names, rows)))
+    handle.write(';\nend;\n')
+
+
+def _write_a2m_rows(handle, records, drop_insert_gaps):
+    rows, _ = _collect_rows(records)
+
+    # columns where the first (query) row has a gap are insert columns, the rest match columns
+    query = np.frombuffer(rows[0][2].encode('ascii'), dtype=np.uint8)
+    insert = (query == ord('-')) | (query == ord('.'))
+    for row_id, row_label, sequence in rows:
+        row = np.frombuffer(sequence.encode('ascii'), dtype=np.uint8)
+        converted = np.where(insert, INSERT_TABLE[row], UPPER_TABLE[row])
+        if drop_insert_gaps:
+            converted = converted[~insert | (converted != ord('.'))]
+        handle.write(f'>{fasta_title(row_id, row_label)}\n{converted.tobytes().decode()}\n')
+
+
+def write_a2m(handle, records):
+    """
+    write_a2m: write records as A2M, taking the columns where the first row has a residue as
+               match columns (uppercase, '-' gaps) and the others as insert columns (lowercase,
+               '.' gaps)
+    """
+    _write_a2m_rows(handle, records, drop_insert_gaps=False)
+
+
+def write_a3m(handle, records):
+    """
+    write_a3m: write records as A3M, which is A2M without the gaps of insert columns
+    """
+    _write_a2m_rows(handle, records, drop_insert_gaps=True)
+
+
+def write_unaligned_fasta(handle, records, drop_empty=False, wrap=FASTA_WRAP):
+    """
+    write_unaligned_fasta: write records as FASTA with the gaps removed, one str.translate call
+                           per row, skipping rows left empty if drop_empty is set
+    """
+    for row_id, row_label, sequence in records:
+        sequence = sequence.translate(GAP_DELETE)
+        if drop_empty and not sequence:
+            continue
+
+        lines = [f'>{fasta_title(row_id, row_label)}']
+        lines.extend(sequence[i:i + wrap] for i in range(0, len(sequence), wrap))
+        lines.append('')
+        handle.write('\n'.join(lines))
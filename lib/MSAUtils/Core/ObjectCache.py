@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+
+
+class ObjectCache:
+    """
+    A scratch-backed cache of fetched workspace objects, keyed by versioned workspace reference.
+
+    Each object's name and data are stored as zlib compressed JSON in their own file, indexed
+    by a SQLite database shared by concurrent server workers. Files are written to a temporary
+    name and renamed into place, so readers never see a partial entry. Once the stored bytes go
+    over max_bytes the least recently used entries are evicted. Objects larger than
+    max_object_bytes are not stored, as encoding them would hold several copies in memory.
+    """
+
+    # zlib level for stored objects, favouring speed since alignments compress well anyway
+    COMPRESSLEVEL = 1
+
+    def __init__(self, cache_dir, max_bytes=1024 ** 3, max_object_bytes=64 * 1024 ** 2):
+        self.max_bytes = max_bytes
+        self.max_object_bytes = max_object_bytes
+        if not max_bytes:
+            # a disabled cache never touches cache_dir
+            return
+
+        self.object_dir = os.path.join(cache_dir, 'objects')
+        os.makedirs(self.object_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, 'object_cache.sqlite')
+
+        with self._connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS objects ('
+                         'ref TEXT PRIMARY KEY, '
+                         'file_name TEXT NOT NULL, '
+                         'size INTEGER NOT NULL, '
+                         'last_used REAL NOT NULL)')
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, ref):
+        """
+        get: the cached (obj_name, obj_data) for a versioned reference, or None
+        """
+        if not self.max_bytes:
+            return None
+
+        with self._connect() as conn:
+            row = conn.execute('SELECT file_name FROM objects WHERE ref = ?', (ref,)).fetchone()
+            if row is None:
+                return None
+            conn.execute('UPDATE objects SET last_used = ? WHERE ref = ?', (time.time(), ref))
+
+        try:
+            with open(os.path.join(self.object_dir, row[0]), 'rb') as f:
+                obj_name, obj_data = json.loads(zlib.decompress(f.read()))
+        except (OSError, ValueError, zlib.error):
+            # evicted by another worker in the meantime, or damaged
+            return None
+
+        return obj_name, obj_data
+
+    def put(self, ref, obj_name, obj_data, size=None):
+        """
+        put: store an object and evict the least recently used objects over the byte budget
+             size is the object's workspace size, objects over max_object_bytes are skipped
+        """
+        if not self.max_bytes or (size is not None and size > self.max_object_bytes):
+            return
+
+        payload = zlib.compress(json.dumps([obj_name, obj_data]).encode(), self.COMPRESSLEVEL)
+        if len(payload) > self.max_bytes:
+            return
+
+        file_name = hashlib.sha1(ref.encode()).hexdigest() + '.json.z'
+        fd, tmp_path = tempfile.mkstemp(dir=self.object_dir)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, os.path.join(self.object_dir, file_name))
+
+        with self._connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?)',
+                         (ref, file_name, len(payload), time.time()))
+            self._evict(conn)
+
+    def _evict(self, conn):
+        total = 0
+        evicted = []
+        for ref, file_name, size in conn.execute(
+                'SELECT ref, file_name, size FROM objects ORDER BY last_used DESC').fetchall():
+            total += size
+            if total > self.max_bytes:
+                evicted.append((ref, file_name))
+
+        for ref, file_name in evicted:
+            conn.execute('DELETE FROM objects WHERE ref = ?', (ref,))
+            try:
+                os.remove(os.path.join(self.object_dir, file_name))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,52 @@
+import os
+import tempfile
+from collections.abc import Mapping
+
+
+class RowSpool(Mapping):
+    """
+    The rows of an alignment spooled to an anonymous temporary file as they arrive, in any
+    order, and read back one at a time by row id.
+
+    The spool is a read-only mapping from row id to sequence, so it can stand in for the
+    alignment dict of a KBaseTrees.MSA object while only an offset index is held in memory.
+    Rows are read with positional reads, so threads may read the spool concurrently once it is
+    filled.
+    """
+
+    def __init__(self, spool_dir):
+        self.handle = tempfile.TemporaryFile(dir=spool_dir, buffering=0)
+        self.index = {}
+        self.size = 0
+
+    def add(self, row_id, sequence):
+        """add: append one row to the spool"""
+        data = sequence.encode()
+        view = memoryview(data)
+        while view:
+            # an unbuffered write may be partial
+            view = view[self.handle.write(view):]
+        self.index[row_id] = (self.size, len(data))
+        self.size += len(data)
+
+    def __getitem__(self, row_id):
+        offset, length = self.index[row_id]
+        return os.pread(self.handle.fileno(), length, offset).decode()
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, row_id):
+        return row_id in self.index
+
+    def close(self):
+        self.handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -47,16 +47,26 @@ class MSAUtils:
     def import_msa_file(self, ctx, params):
         """
         import_msa_file: import a MSA from FASTA
-        :param params: instance of type "ImportMSAParams" -> structure:
+        :param params: instance of type "ImportMSAParams" (file_format - the
+           alignment format, as named by Bio.AlignIO (default 'fasta'), or
+           'auto' to detect it from the file header multiple_alignments -
+           import every alignment in the file (e.g. a Stockholm or PHYLIP
+           file holding many alignments) as its own MSA object named
+           <msa_name>_<index> parallel_workers - parse an uncompressed FASTA
+           file in chunks across this many processes) -> structure:
            parameter "input_shock_id" of String, parameter "input_file_path"
            of String, parameter "input_staging_file_path" of String,
-           parameter "msa_name" of String, parameter "description" of String,
+           parameter "file_format" of String, parameter "multiple_alignments"
+           of type "boolean" (A boolean - 0 for false, 1 for true. @range (0,
+           1)), parameter "parallel_workers" of Long, parameter "msa_name" of
+           String, parameter "description" of String,
            parameter "workspace_name" of String
         :returns: instance of type "ImportMSAOutput" (@optional report_name
-           report_ref) -> structure: parameter "report_name" of String,
-           parameter "report_ref" of type "obj_ref" (An X/Y/Z style reference
-           @id ws), parameter "msa_obj_ref" of type "obj_ref" (An X/Y/Z style
-           reference @id ws)
+           report_ref msa_obj_refs) -> structure: parameter "report_name" of
+           String, parameter "report_ref" of type "obj_ref" (An X/Y/Z style
+           reference @id ws), parameter "msa_obj_ref" of type "obj_ref" (An
+           X/Y/Z style reference @id ws), parameter "msa_obj_refs" of list of
+           type "obj_ref" (An X/Y/Z style reference @id ws)
         """
         # ctx is the context object
         # return variables are: result
@@ -74,9 +84,19 @@ class MSAUtils:
 
     def msa_to_fasta_file(self, ctx, params):
         """
-        :param params: instance of type "MSAToFileParams" -> structure:
-           parameter "msa_name" of String, parameter "workspace_name" of
-           String
+        :param params: instance of type "MSAToFileParams" (input_ref - the MSA
+           to write out destination_dir - the directory to write the file to
+           rows - only write these rows, in this order; only they are fetched
+           from the workspace column_range - only write the alignment columns
+           [first, last], 1-based and inclusive max_gap_fraction - drop the
+           columns whose fraction of gaps is over this value min_row_coverage
+           - drop the rows whose fraction of non-gaps in the kept columns is
+           under this value) -> structure: parameter "input_ref" of type
+           "obj_ref" (An X/Y/Z style reference @id ws), parameter
+           "destination_dir" of String, parameter "rows" of list of String,
+           parameter "column_range" of tuple of size 2: Long, Long, parameter
+           "max_gap_fraction" of Double, parameter "min_row_coverage" of
+           Double
         :returns: instance of type "MSAFilesOutput" -> structure: parameter
            "file_path" of String
         """
@@ -96,9 +116,19 @@ class MSAUtils:
 
     def msa_to_clustal_file(self, ctx, params):
         """
-        :param params: instance of type "MSAToFileParams" -> structure:
-           parameter "msa_name" of String, parameter "workspace_name" of
-           String
+        :param params: instance of type "MSAToFileParams" (input_ref - the MSA
+           to write out destination_dir - the directory to write the file to
+           rows - only write these rows, in this order; only they are fetched
+           from the workspace column_range - only write the alignment columns
+           [first, last], 1-based and inclusive max_gap_fraction - drop the
+           columns whose fraction of gaps is over this value min_row_coverage
+           - drop the rows whose fraction of non-gaps in the kept columns is
+           under this value) -> structure: parameter "input_ref" of type
+           "obj_ref" (An X/Y/Z style reference @id ws), parameter
+           "destination_dir" of String, parameter "rows" of list of String,
+           parameter "column_range" of tuple of size 2: Long, Long, parameter
+           "max_gap_fraction" of Double, parameter "min_row_coverage" of
+           Double
         :returns: instance of type "MSAFilesOutput" -> structure: parameter
            "file_path" of String
         """
@@ -116,11 +146,216 @@ class MSAUtils:
         # return the results
         return [files]
 
+    def msa_to_phylip_file(self, ctx, params):
+        """
+        msa_to_phylip_file: relaxed PHYLIP, names are padded to the longest row id
+        :param params: instance of type "MSAToFileParams" (input_ref - the MSA
+           to write out destination_dir - the directory to write the file to
+           rows - only write these rows, in this order; only they are fetched
+           from the workspace column_range - only write the alignment columns
+           [first, last], 1-based and inclusive max_gap_fraction - drop the
+           columns whose fraction of gaps is over this value min_row_coverage
+           - drop the rows whose fraction of non-gaps in the kept columns is
+           under this value) -> structure: parameter "input_ref" of type
+           "obj_ref" (An X/Y/Z style reference @id ws), parameter
+           "destination_dir" of String, parameter "rows" of list of String,
+           parameter "column_range" of tuple of size 2: Long, Long, parameter
+           "max_gap_fraction" of Double, parameter "min_row_coverage" of
+           Double
+        :returns: instance of type "MSAFilesOutput" -> structure: parameter
+           "file_path" of String
+        """
+        # ctx is the context object
+        # return variables are: files
+        #BEGIN msa_to_phylip_file
+        logging.info('Starting msa_to_phylip_file with params:\n{}'.format(params))
+        files = self.futil.msa_to_file(params, 'phylip-relaxed')
+        #END msa_to_phylip_file
+
+        # At some point might do deeper type checking...
+        if not isinstance(files, dict):
+            raise ValueError('Method msa_to_phylip_file return value ' +
+                             'files is not type dict as required.')
+        # return the results
+        return [files]
+
+    def msa_to_strict_phylip_file(self, ctx, params):
+        """
+        msa_to_strict_phylip_file: strict PHYLIP, names are truncated to 10 characters
+        :param params: instance of type "MSAToFileParams" (input_ref - the MSA
+           to write out destination_dir - the directory to write the file to
+           rows - only write these rows, in this order; only they are fetched
+           from the workspace column_range - only write the alignment columns
+           [first, last], 1-based and inclusive max_gap_fraction - drop the
+           columns whose fraction of gaps is over this value min_row_coverage
+           - drop the rows whose fraction of non-gaps in the kept columns is
+           under this value) -> structure: parameter "input_ref" of type
+           "obj_ref" (An X/Y/Z style reference @id ws), parameter
+           "destination_dir" of String, parameter "rows" of list of String,
+           parameter "column_range" of tuple of size 2: Long, Long, parameter
+           "max_gap_fraction" of Double, parameter "min_row_coverage" of
+           Double
+        :returns: instance of type "MSAFilesOutput" -> structure: parameter
+           "file_path" of String
+        """
+        # ctx is the context object
+        # return variables are: files
+        #BEGIN msa_to_strict_phylip_file
+        logging.info('Starting msa_to_strict_phylip_file with params:\n{}'.format(params))
+        files = self.futil.msa_to_file(params, 'phylip')
+        #END msa_to_strict_phylip_file
+
+        # At some point might do deeper type checking...
+        if not isinstance(files, dict):
+            raise ValueError('Method msa_to_strict_phylip_file return value ' +
+                             'files is not type dict as required.')
+        # return the results
+        return [files]
+
+    def msa_to_stockholm_file(self, ctx, params):
+        """
+        :param params: instance of type "MSAToFileParams" (input_ref - the MSA
+           to write out destination_dir - the directory to write the file to
+           rows - only write these rows, in this order; only they are fetched
+           from the workspace column_range - only write the alignment columns
+           [first, last], 1-based and inclusive max_gap_fraction - drop the
+           columns whose fraction of gaps is over this value min_row_coverage
+           - drop the rows whose fraction of non-gaps in the kept columns is
+           under this value) -> structure: parameter "input_ref" of type
+           "obj_ref" (An X/Y/Z style reference @id ws), parameter
+           "destination_dir" of String, parameter "rows" of list of String,
+           parameter "column_range" of tuple of size 2: Long, Long, parameter
+           "max_gap_fraction" of Double, parameter "min_row_coverage" of
+           Double
+        :returns: instance of type "MSAFilesOutput" -> structure: parameter
+           "file_path" of String
+        """
+        # ctx is the context object
+        # return variables are: files
+        #BEGIN msa_to_stockholm_file
+        logging.info('Starting msa_to_stockholm_file with params:\n{}'.format(params))
+        files = self.futil.msa_to_file(params, 'stockholm')
+        #END msa_to_stockholm_file
+
+        # At some point might do deeper type checking...
+        if not isinstance(files, dict):
+            raise ValueError('Method msa_to_stockholm_file return value ' +
+                             'files is not type dict as required.')
+        # return the results
+        return [files]
+
+    def msa_to_nexus_file(self, ctx, params):
+        """
+        :param params: instance of type "MSAToFileParams" (input_ref - the MSA
+           to write out destination_dir - the directory to write the file to
+           rows - only write these rows, in this order; only they are fetched
+           from the workspace column_range - only write the alignment columns
+           [first, last], 1-based and inclusive max_gap_fraction - drop the
+           columns whose fraction of gaps is over this value min_row_coverage
+           - drop the rows whose fraction of non-gaps in the kept columns is
+           under this value) -> structure: parameter "input_ref" of type
+           "obj_ref" (An X/Y/Z style reference @id ws), parameter
+           "destination_dir" of String, parameter "rows" of list of String,
+           parameter "column_range" of tuple of size 2: Long, Long, parameter
+           "max_gap_fraction" of Double, parameter "min_row_coverage" of
+           Double
+        :returns: instance of type "MSAFilesOutput" -> structure: parameter
+           "file_path" of String
+        """
+        # ctx is the context object
+        # return variables are: files
+        #BEGIN msa_to_nexus_file
+        logging.info('Starting msa_to_nexus_file with params:\n{}'.format(params))
+        files = self.futil.msa_to_file(params, 'nexus')
+        #END msa_to_nexus_file
+
+        # At some point might do deeper type checking...
+        if not isinstance(files, dict):
+            raise ValueError('Method msa_to_nexus_file return value ' +
+                             'files is not type dict as required.')
+        # return the results
+        return [files]
+
+    def msa_to_a2m_file(self, ctx, params):
+        """
+        msa_to_a2m_file: A2M, the columns where the first row has a residue are matches
+        :param params: instance of type "MSAToFileParams" (input_ref - the MSA
+           to write out destination_dir - the directory to write the file to
+           rows - only write these rows, in this order; only they are fetched
+           from the workspace column_range - only write the alignment columns
+           [first, last], 1-based and inclusive max_gap_fraction - drop the
+           columns whose fraction of gaps is over this value min_row_coverage
+           - drop the rows whose fraction of non-gaps in the kept columns is
+           under this value) -> structure: parameter "input_ref" of type
+           "obj_ref" (An X/Y/Z style reference @id ws), parameter
+           "destination_dir" of String, parameter "rows" of list of String,
+           parameter "column_range" of tuple of size 2: Long, Long, parameter
+           "max_gap_fraction" of Double, parameter "min_row_coverage" of
+           Double
+        :returns: instance of type "MSAFilesOutput" -> structure: parameter
+           "file_path" of String
+        """
+        # ctx is the context object
+        # return variables are: files
+        #BEGIN msa_to_a2m_file
+        logging.info('Starting msa_to_a2m_file with params:\n{}'.format(params))
+        files = self.futil.msa_to_file(params, 'a2m')
+        #END msa_to_a2m_file
+
+        # At some point might do deeper type checking...
+        if not isinstance(files, dict):
+            raise ValueError('Method msa_to_a2m_file return value ' +
+                             'files is not type dict as required.')
+        # return the results
+        return [files]
+
+    def msa_to_a3m_file(self, ctx, params):
+        """
+        msa_to_a3m_file: A3M, that is A2M without the gaps of insert columns
+        :param params: instance of type "MSAToFileParams" (input_ref - the MSA
+           to write out destination_dir - the directory to write the file to
+           rows - only write these rows, in this order; only they are fetched
+           from the workspace column_range - only write the alignment columns
+           [first, last], 1-based and inclusive max_gap_fraction - drop the
+           columns whose fraction of gaps is over this value min_row_coverage
+           - drop the rows whose fraction of non-gaps in the kept columns is
+           under this value) -> structure: parameter "input_ref" of type
+           "obj_ref" (An X/Y/Z style reference @id ws), parameter
+           "destination_dir" of String, parameter "rows" of list of String,
+           parameter "column_range" of tuple of size 2: Long, Long, parameter
+           "max_gap_fraction" of Double, parameter "min_row_coverage" of
+           Double
+        :returns: instance of type "MSAFilesOutput" -> structure: parameter
+           "file_path" of String
+        """
+        # ctx is the context object
+        # return variables are: files
+        #BEGIN msa_to_a3m_file
+        logging.info('Starting msa_to_a3m_file with params:\n{}'.format(params))
+        files = self.futil.msa_to_file(params, 'a3m')
+        #END msa_to_a3m_file
+
+        # At some point might do deeper type checking...
+        if not isinstance(files, dict):
+            raise ValueError('Method msa_to_a3m_file return value ' +
+                             'files is not type dict as required.')
+        # return the results
+        return [files]
+
     def export_msa_as_fasta_file(self, ctx, params):
         """
-        :param params: instance of type "ExportParams" -> structure:
+        :param params: instance of type "ExportParams" (input_ref - the MSA to
+           export rows - only export these rows, in this order; only they are
+           fetched from the workspace column_range - only export the
+           alignment columns [first, last], 1-based and inclusive
+           max_gap_fraction - drop the columns whose fraction of gaps is over
+           this value min_row_coverage - drop the rows whose fraction of
+           non-gaps in the kept columns is under this value) -> structure:
            parameter "input_ref" of type "obj_ref" (An X/Y/Z style reference
-           @id ws)
+           @id ws), parameter "rows" of list of String, parameter
+           "column_range" of tuple of size 2: Long, Long, parameter
+           "max_gap_fraction" of Double, parameter "min_row_coverage" of
+           Double
         :returns: instance of type "ExportOutput" -> structure: parameter
            "shock_id" of String
         """
@@ -140,9 +375,18 @@ class MSAUtils:
 
     def export_msa_as_clustal_file(self, ctx, params):
         """
-        :param params: instance of type "ExportParams" -> structure:
+        :param params: instance of type "ExportParams" (input_ref - the MSA to
+           export rows - only export these rows, in this order; only they are
+           fetched from the workspace column_range - only export the
+           alignment columns [first, last], 1-based and inclusive
+           max_gap_fraction - drop the columns whose fraction of gaps is over
+           this value min_row_coverage - drop the rows whose fraction of
+           non-gaps in the kept columns is under this value) -> structure:
            parameter "input_ref" of type "obj_ref" (An X/Y/Z style reference
-           @id ws)
+           @id ws), parameter "rows" of list of String, parameter
+           "column_range" of tuple of size 2: Long, Long, parameter
+           "max_gap_fraction" of Double, parameter "min_row_coverage" of
+           Double
         :returns: instance of type "ExportOutput" -> structure: parameter
            "shock_id" of String
         """
@@ -159,6 +403,281 @@ class MSAUtils:
                              'output is not type dict as required.')
         # return the results
         return [output]
+
+    def export_msa_as_phylip_file(self, ctx, params):
+        """
+        export_msa_as_phylip_file: relaxed PHYLIP, names are padded to the longest row id
+        :param params: instance of type "ExportParams" (input_ref - the MSA to
+           export rows - only export these rows, in this order; only they are
+           fetched from the workspace column_range - only export the
+           alignment columns [first, last], 1-based and inclusive
+           max_gap_fraction - drop the columns whose fraction of gaps is over
+           this value min_row_coverage - drop the rows whose fraction of
+           non-gaps in the kept columns is under this value) -> structure:
+           parameter "input_ref" of type "obj_ref" (An X/Y/Z style reference
+           @id ws), parameter "rows" of list of String, parameter
+           "column_range" of tuple of size 2: Long, Long, parameter
+           "max_gap_fraction" of Double, parameter "min_row_coverage" of
+           Double
+        :returns: instance of type "ExportOutput" -> structure: parameter
+           "shock_id" of String
+        """
+        # ctx is the context object
+        # return variables are: output
+        #BEGIN export_msa_as_phylip_file
+        logging.info('Starting export_msa_as_phylip_file with params:\n{}'.format(params))
+        output = self.futil.export_file(params, file_type='phylip-relaxed')
+        #END export_msa_as_phylip_file
+
+        # At some point might do deeper type checking...
+        if not isinstance(output, dict):
+            raise ValueError('Method export_msa_as_phylip_file return value ' +
+                             'output is not type dict as required.')
+        # return the results
+        return [output]
+
+    def export_msa_as_strict_phylip_file(self, ctx, params):
+        """
+        export_msa_as_strict_phylip_file: strict PHYLIP, names are truncated to 10 characters
+        :param params: instance of type "ExportParams" (input_ref - the MSA to
+           export rows - only export these rows, in this order; only they are
+           fetched from the workspace column_range - only export the
+           alignment columns [first, last], 1-based and inclusive
+           max_gap_fraction - drop the columns whose fraction of gaps is over
+           this value min_row_coverage - drop the rows whose fraction of
+           non-gaps in the kept columns is under this value) -> structure:
+           parameter "input_ref" of type "obj_ref" (An X/Y/Z style reference
+           @id ws), parameter "rows" of list of String, parameter
+           "column_range" of tuple of size 2: Long, Long, parameter
+           "max_gap_fraction" of Double, parameter "min_row_coverage" of
+           Double
+        :returns: instance of type "ExportOutput" -> structure: parameter
+           "shock_id" of String
+        """
+        # ctx is the context object
+        # return variables are: output
+        #BEGIN export_msa_as_strict_phylip_file
+        logging.info('Starting export_msa_as_strict_phylip_file with params:\n{}'.format(params))
+        output = self.futil.export_file(params, file_type='phylip')
+        #END export_msa_as_strict_phylip_file
+
+        # At some point might do deeper type checking...
+        if not isinstance(output, dict):
+            raise ValueError('Method export_msa_as_strict_phylip_file return value ' +
+                             'output is not type dict as required.')
+        # return the results
+        return [output]
+
+    def export_msa_as_stockholm_file(self, ctx, params):
+        """
+        :param params: instance of type "ExportParams" (input_ref - the MSA to
+           export rows - only export these rows, in this order; only they are
+           fetched from the workspace column_range - only export the
+           alignment columns [first, last], 1-based and inclusive
+           max_gap_fraction - drop the columns whose fraction of gaps is over
+           this value min_row_coverage - drop the rows whose fraction of
+           non-gaps in the kept columns is under this value) -> structure:
+           parameter "input_ref" of type "obj_ref" (An X/Y/Z style reference
+           @id ws), parameter "rows" of list of String, parameter
+           "column_range" of tuple of size 2: Long, Long, parameter
+           "max_gap_fraction" of Double, parameter "min_row_coverage" of
+           Double
+        :returns: instance of type "ExportOutput" -> structure: parameter
+           "shock_id" of String
+        """
+        # ctx is the context object
+        # return variables are: output
+        #BEGIN export_msa_as_stockholm_file
+        logging.info('Starting export_msa_as_stockholm_file with params:\n{}'.format(params))
+        output = self.futil.export_file(params, file_type='stockholm')
+        #END export_msa_as_stockholm_file
+
+        # At some point might do deeper type checking...
+        if not isinstance(output, dict):
+            raise ValueError('Method export_msa_as_stockholm_file return value ' +
+                             'output is not type dict as required.')
+        # return the results
+        return [output]
+
+    def export_msa_as_nexus_file(self, ctx, params):
+        """
+        :param params: instance of type "ExportParams" (input_ref - the MSA to
+           export rows - only export these rows, in this order; only they are
+           fetched from the workspace column_range - only export the
+           alignment columns [first, last], 1-based and inclusive
+           max_gap_fraction - drop the columns whose fraction of gaps is over
+           this value min_row_coverage - drop the rows whose fraction of
+           non-gaps in the kept columns is under this value) -> structure:
+           parameter "input_ref" of type "obj_ref" (An X/Y/Z style reference
+           @id ws), parameter "rows" of list of String, parameter
+           "column_range" of tuple of size 2: Long, Long, parameter
+           "max_gap_fraction" of Double, parameter "min_row_coverage" of
+           Double
+        :returns: instance of type "ExportOutput" -> structure: parameter
+           "shock_id" of String
+        """
+        # ctx is the context object
+        # return variables are: output
+        #BEGIN export_msa_as_nexus_file
+        logging.info('Starting export_msa_as_nexus_file with params:\n{}'.format(params))
+        output = self.futil.export_file(params, file_type='nexus')
+        #END export_msa_as_nexus_file
+
+        # At some point might do deeper type checking...
+        if not isinstance(output, dict):
+            raise ValueError('Method export_msa_as_nexus_file return value ' +
+                             'output is not type dict as required.')
+        # return the results
+        return [output]
+
+    def export_msa_as_a2m_file(self, ctx, params):
+        """
+        export_msa_as_a2m_file: A2M, the columns where the first row has a residue are matches
+        :param params: instance of type "ExportParams" (input_ref - the MSA to
+           export rows - only export these rows, in this order; only they are
+           fetched from the workspace column_range - only export the
+           alignment columns [first, last], 1-based and inclusive
+           max_gap_fraction - drop the columns whose fraction of gaps is over
+           this value min_row_coverage - drop the rows whose fraction of
+           non-gaps in the kept columns is under this value) -> structure:
+           parameter "input_ref" of type "obj_ref" (An X/Y/Z style reference
+           @id ws), parameter "rows" of list of String, parameter
+           "column_range" of tuple of size 2: Long, Long, parameter
+           "max_gap_fraction" of Double, parameter "min_row_coverage" of
+           Double
+        :returns: instance of type "ExportOutput" -> structure: parameter
+           "shock_id" of String
+        """
+        # ctx is the context object
+        # return variables are: output
+        #BEGIN export_msa_as_a2m_file
+        logging.info('Starting export_msa_as_a2m_file with params:\n{}'.format(params))
+        output = self.futil.export_file(params, file_type='a2m')
+        #END export_msa_as_a2m_file
+
+        # At some point might do deeper type checking...
+        if not isinstance(output, dict):
+            raise ValueError('Method export_msa_as_a2m_file return value ' +
+                             'output is not type dict as required.')
+        # return the results
+        return [output]
+
+    def export_msa_as_a3m_file(self, ctx, params):
+        """
+        export_msa_as_a3m_file: A3M, that is A2M without the gaps of insert columns
+        :param params: instance of type "ExportParams" (input_ref - the MSA to
+           export rows - only export these rows, in this order; only they are
+           fetched from the workspace column_range - only export the
+           alignment columns [first, last], 1-based and inclusive
+           max_gap_fraction - drop the columns whose fraction of gaps is over
+           this value min_row_coverage - drop the rows whose fraction of
+           non-gaps in the kept columns is under this value) -> structure:
+           parameter "input_ref" of type "obj_ref" (An X/Y/Z style reference
+           @id ws), parameter "rows" of list of String, parameter
+           "column_range" of tuple of size 2: Long, Long, parameter
+           "max_gap_fraction" of Double, parameter "min_row_coverage" of
+           Double
+        :returns: instance of type "ExportOutput" -> structure: parameter
+           "shock_id" of String
+        """
+        # ctx is the context object
+        # return variables are: output
+        #BEGIN export_msa_as_a3m_file
+        logging.info('Starting export_msa_as_a3m_file with params:\n{}'.format(params))
+        output = self.futil.export_file(params, file_type='a3m')
+        #END export_msa_as_a3m_file
+
+        # At some point might do deeper type checking...
+        if not isinstance(output, dict):
+            raise ValueError('Method export_msa_as_a3m_file return value ' +
+                             'output is not type dict as required.')
+        # return the results
+        return [output]
+
+    def export_msa_as_unaligned_fasta(self, ctx, params):
+        """
+        export_msa_as_unaligned_fasta: the sequences of the MSA with their gaps removed
+        :param params: instance of type "ExportUnalignedParams" (input_ref -
+           the MSA to export rows - only export these rows, in this order;
+           only they are fetched from the workspace drop_empty_rows - leave
+           out the rows that are all gaps) -> structure: parameter
+           "input_ref" of type "obj_ref" (An X/Y/Z style reference @id ws),
+           parameter "rows" of list of String, parameter "drop_empty_rows"
+           of type "boolean" (A boolean - 0 for false, 1 for true. @range (0,
+           1))
+        :returns: instance of type "ExportOutput" -> structure: parameter
+           "shock_id" of String
+        """
+        # ctx is the context object
+        # return variables are: output
+        #BEGIN export_msa_as_unaligned_fasta
+        logging.info('Starting export_msa_as_unaligned_fasta with params:\n{}'.format(params))
+        output = self.futil.export_file(params, file_type='unaligned-fasta')
+        #END export_msa_as_unaligned_fasta
+
+        # At some point might do deeper type checking...
+        if not isinstance(output, dict):
+            raise ValueError('Method export_msa_as_unaligned_fasta return value ' +
+                             'output is not type dict as required.')
+        # return the results
+        return [output]
+
+    def export_msa_files(self, ctx, params):
+        """
+        export_msa_files: export one MSA in several formats from a single fetch of the object
+        :param params: instance of type "ExportFilesParams" (input_ref - the
+           MSA to export formats - the file formats to export it in, e.g.
+           ["fasta", "clustal", "phylip"] rows, column_range,
+           max_gap_fraction, min_row_coverage - as for ExportParams) ->
+           structure: parameter "input_ref" of type "obj_ref" (An X/Y/Z style
+           reference @id ws), parameter "formats" of list of String,
+           parameter "rows" of list of String, parameter "column_range" of
+           tuple of size 2: Long, Long, parameter "max_gap_fraction" of
+           Double, parameter "min_row_coverage" of Double
+        :returns: instance of type "ExportFilesOutput" (shock_ids - the shock
+           id of the gzipped export file of each format) -> structure:
+           parameter "shock_ids" of mapping from String to String
+        """
+        # ctx is the context object
+        # return variables are: output
+        #BEGIN export_msa_files
+        logging.info('Starting export_msa_files with params:\n{}'.format(params))
+        output = self.futil.export_files(params)
+        #END export_msa_files
+
+        # At some point might do deeper type checking...
+        if not isinstance(output, dict):
+            raise ValueError('Method export_msa_files return value ' +
+                             'output is not type dict as required.')
+        # return the results
+        return [output]
+
+    def export_msas_batch(self, ctx, params):
+        """
+        export_msas_batch: export many MSAs in one format with batched fetches and one upload
+        :param params: instance of type "ExportBatchParams" (input_refs - the
+           MSAs to export format - the file format to export them in, e.g.
+           "fasta") -> structure: parameter "input_refs" of list of type
+           "obj_ref" (An X/Y/Z style reference @id ws), parameter "format" of
+           String
+        :returns: instance of type "ExportBatchOutput" (shock_ids - the shock
+           id of the gzipped export file of each input ref) -> structure:
+           parameter "shock_ids" of mapping from type "obj_ref" (An X/Y/Z
+           style reference @id ws) to String
+        """
+        # ctx is the context object
+        # return variables are: output
+        #BEGIN export_msas_batch
+        logging.info('Starting export_msas_batch with params:\n{}'.format(params))
+        output = self.futil.export_batch(params)
+        #END export_msas_batch
+
+        # At some point might do deeper type checking...
+        if not isinstance(output, dict):
+            raise ValueError('Method export_msas_batch return value ' +
+                             'output is not type dict as required.')
+        # return the results
+        return [output]
     def status(self, ctx):
         #BEGIN_STATUS
         returnVal = {'state': "OK",
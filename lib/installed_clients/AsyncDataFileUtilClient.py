@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+from .asyncbaseclient import AsyncBaseClient as _AsyncBaseClient
+
+
+class AsyncDataFileUtil(object):
+    '''
+    Async versions of the DataFileUtil methods MSAUtils uses; see
+    DataFileUtilClient.DataFileUtil for their parameters.
+    '''
+
+    def __init__(self, url=None, timeout=30 * 60, token=None,
+                 service_ver='release', **kwargs):
+        if url is None:
+            raise ValueError('A url is required')
+        self._service_ver = service_ver
+        self._client = _AsyncBaseClient(url, timeout=timeout, token=token,
+                                        **kwargs)
+
+    async def close(self):
+        await self._client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def file_to_shock(self, params, context=None):
+        """
+        Load a file to Shock.
+        """
+        return await self._client.run_job('DataFileUtil.file_to_shock',
+                                          [params], self._service_ver, context)
+
+    async def file_to_shock_mass(self, params, context=None):
+        """
+        Load multiple files to Shock.
+        """
+        return await self._client.run_job('DataFileUtil.file_to_shock_mass',
+                                          [params], self._service_ver, context)
+
+    async def ws_name_to_id(self, name, context=None):
+        """
+        Translate a workspace name to a workspace ID.
+        """
+        return await self._client.run_job('DataFileUtil.ws_name_to_id',
+                                          [name], self._service_ver, context)
+
+    async def save_objects(self, params, context=None):
+        """
+        Save objects to the workspace.
+        """
+        return await self._client.run_job('DataFileUtil.save_objects',
+                                          [params], self._service_ver, context)
+
+    async def get_objects(self, params, context=None):
+        """
+        Get objects from the workspace.
+        """
+        return await self._client.run_job('DataFileUtil.get_objects',
+                                          [params], self._service_ver, context)
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+from .asyncbaseclient import AsyncBaseClient as _AsyncBaseClient
+
+
+class AsyncKBaseReport(object):
+    '''
+    Async versions of the KBaseReport methods MSAUtils uses; see
+    KBaseReportClient.KBaseReport for their parameters.
+    '''
+
+    def __init__(self, url=None, timeout=30 * 60, token=None,
+                 service_ver='release', **kwargs):
+        if url is None:
+            raise ValueError('A url is required')
+        self._service_ver = service_ver
+        self._client = _AsyncBaseClient(url, timeout=timeout, token=token,
+                                        **kwargs)
+
+    async def close(self):
+        await self._client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def create_extended_report(self, params, context=None):
+        """
+        Create a report for the results of an app run.
+        """
+        return await self._client.run_job('KBaseReport.create_extended_report',
+                                          [params], self._service_ver, context)
@@ -0,0 +1,273 @@
+import asyncio as _asyncio
+import os as _os
+import random as _random
+import traceback as _traceback
+
+try:
+    import aiohttp as _aiohttp
+except ImportError:
+    _aiohttp = None
+
+try:
+    from urllib.parse import urlparse as _urlparse  # py3
+except ImportError:
+    from urlparse import urlparse as _urlparse  # py2
+
+from .baseclient import (ServerError, _AJ, _CT, _CHECK_JOB_RETRYS, _ChainedBody,
+                         _DEFAULT_POOL_SIZE, _URL_SCHEME, _default_codec,
+                         _encode_body, _gzip_rejected, _read_inifile,
+                         _splice_json_files)
+
+# bytes of a JSONFile request body read per step, off the event loop
+_BODY_CHUNK = 1024 * 1024
+
+
+def _body_length(body):
+    # the length of a streamed body: a _ChainedBody, or the temporary file a
+    # gzipped one was compressed to
+    if isinstance(body, _ChainedBody):
+        return len(body)
+    return _os.fstat(body.fileno()).st_size
+
+
+async def _read_body(body):
+    loop = _asyncio.get_running_loop()
+    try:
+        while True:
+            chunk = await loop.run_in_executor(None, body.read, _BODY_CHUNK)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        body.close()
+
+
+class AsyncBaseClient(object):
+    '''
+    The asyncio counterpart of BaseClient, built on aiohttp, so that
+    independent calls can run concurrently on one event loop.
+    Required initialization arguments (positional):
+    url - the url of the the service to contact:
+        For SDK methods: the url of the callback service.
+        For other services: the url of the service.
+    Optional arguments (keywords in positional order):
+    timeout - methods will fail if they take longer than this value in seconds.
+        Default 1800.
+    token - a KBase authentication token. Defaults to the KB_AUTH_TOKEN
+        environment variable or the token in ~/.kbase_config.
+    ignore_authrc - if True, don't read auth configuration from
+        ~/.kbase_config.
+    trust_all_ssl_certificates - set to True to trust self-signed certificates.
+        If you don't understand the implications, leave as the default, False.
+    async_job_check_time_ms - the wait time between checking job state for
+        asynchronous jobs run with the run_job method.
+    pool_size - the most connections kept open per host. Defaults to the
+        KB_CLIENT_POOL_SIZE environment variable, or 10.
+    json_codec - the codec for request and response bodies, as for
+        BaseClient.
+    gzip_requests_over - send request bodies larger than this many bytes
+        gzipped, falling back to plain bodies when the server rejects them, as
+        for BaseClient. Defaults to the KB_CLIENT_GZIP_REQUESTS_OVER
+        environment variable, or no compression.
+    The aiohttp session is opened on first use, in the running event loop,
+    and must be closed with close() or by using the client as an async context
+    manager. JSONFile arguments are streamed as in BaseClient.
+    '''
+    def __init__(
+            self, url=None, timeout=30 * 60, token=None, ignore_authrc=False,
+            trust_all_ssl_certificates=False,
+            async_job_check_time_ms=100,
+            async_job_check_time_scale_percent=150,
+            async_job_check_max_time_ms=300000,
+            pool_size=None,
+            json_codec=None,
+            gzip_requests_over=None):
+        if _aiohttp is None:
+            raise ImportError('AsyncBaseClient requires the aiohttp package')
+        if url is None:
+            raise ValueError('A url is required')
+        scheme, _, _, _, _, _ = _urlparse(url)
+        if scheme not in _URL_SCHEME:
+            raise ValueError(url + " isn't a valid http url")
+        self.url = url
+        self.timeout = int(timeout)
+        if self.timeout < 1:
+            raise ValueError('Timeout value must be at least 1 second')
+        self._headers = dict()
+        self.trust_all_ssl_certificates = trust_all_ssl_certificates
+        self.async_job_check_time = async_job_check_time_ms / 1000.0
+        self.async_job_check_time_scale_percent = (
+            async_job_check_time_scale_percent)
+        self.async_job_check_max_time = async_job_check_max_time_ms / 1000.0
+        if token is None:
+            token = _os.environ.get('KB_AUTH_TOKEN')
+        if token is None and not ignore_authrc:
+            authdata = _read_inifile()
+            if authdata is not None:
+                token = authdata.get('token')
+        if token is not None:
+            self._headers['AUTHORIZATION'] = token
+        if pool_size is None:
+            pool_size = _os.environ.get('KB_CLIENT_POOL_SIZE',
+                                        _DEFAULT_POOL_SIZE)
+        self.pool_size = int(pool_size)
+        if self.pool_size < 1:
+            raise ValueError('Pool size must be at least 1')
+        self._codec = json_codec or _default_codec()
+        if gzip_requests_over is None:
+            gzip_requests_over = _os.environ.get(
+                'KB_CLIENT_GZIP_REQUESTS_OVER')
+        self.gzip_requests_over = (None if gzip_requests_over in (None, '')
+                                   else int(gzip_requests_over))
+        self._session = None
+
+    @staticmethod
+    def available():
+        '''Whether aiohttp is installed, so the client can be used'''
+        return _aiohttp is not None
+
+    def _get_session(self):
+        if self._session is None:
+            connector = _aiohttp.TCPConnector(
+                limit_per_host=self.pool_size,
+                ssl=False if self.trust_all_ssl_certificates else None)
+            self._session = _aiohttp.ClientSession(
+                connector=connector,
+                timeout=_aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _call(self, url, method, params, context=None):
+        arg_hash = {'method': method,
+                    'params': params,
+                    'version': '1.1',
+                    'id': str(_random.random())[2:]
+                    }
+        if context:
+            if type(context) is not dict:
+                raise ValueError('context is not type dict as required.')
+            arg_hash['context'] = context
+
+        body = _splice_json_files(self._codec.dumps(arg_hash))
+        if self.gzip_requests_over is not None:
+            # compressing a large body takes a while, so it runs off the loop
+            body, compressed = await _asyncio.get_running_loop().run_in_executor(
+                None, _encode_body, body, self.gzip_requests_over)
+        else:
+            body, compressed = _encode_body(body, None)
+        headers = dict(self._headers)
+        if compressed:
+            headers['Content-Encoding'] = 'gzip'
+        data = body
+        if not isinstance(body, bytes):
+            # a known length keeps aiohttp from chunking the streamed body
+            headers['Content-Length'] = str(_body_length(body))
+            data = _read_body(body)
+        try:
+            async with self._get_session().post(url, data=data,
+                                                headers=headers) as ret:
+                content = await ret.read()
+                rejected = compressed and _gzip_rejected(
+                    ret.status, ret.headers.get(_CT), lambda: content)
+                if ret.status == 500 and not rejected:
+                    text = content.decode('utf-8', 'replace')
+                    if ret.headers.get(_CT) == _AJ:
+                        err = self._codec.loads(content)
+                        if 'error' in err:
+                            raise ServerError(**err['error'])
+                        else:
+                            raise ServerError('Unknown', 0, text)
+                    else:
+                        raise ServerError('Unknown', 0, text)
+                if not rejected:
+                    ret.raise_for_status()
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+        if rejected:
+            # the server does not take gzipped bodies, stop sending them
+            self.gzip_requests_over = None
+            return await self._call(url, method, params, context)
+        resp = self._codec.loads(content)
+        if 'result' not in resp:
+            raise ServerError('Unknown', 0, 'An unknown server error occurred')
+        if not resp['result']:
+            return
+        if len(resp['result']) == 1:
+            return resp['result'][0]
+        return resp['result']
+
+    def _set_up_context(self, service_ver=None, context=None):
+        if service_ver:
+            if not context:
+                context = {}
+            context['service_ver'] = service_ver
+        return context
+
+    async def run_job(self, service_method, args, service_ver=None,
+                      context=None):
+        '''
+        Run a SDK method asynchronously, awaiting its result without blocking
+        the event loop while the job state is polled.
+        Required arguments:
+        service_method - the service and method to run, e.g. myserv.mymeth.
+        args - a list of arguments to the method.
+        Optional arguments:
+        service_ver - the version of the service to run, e.g. a git hash
+            or dev/beta/release.
+        context - the rpc context dict.
+        '''
+        mod, meth = service_method.split('.')
+        context = self._set_up_context(service_ver, context)
+        job_id = await self._call(self.url, mod + '._' + meth + '_submit',
+                                  args, context)
+        async_job_check_time = self.async_job_check_time
+        check_job_failures = 0
+        while check_job_failures < _CHECK_JOB_RETRYS:
+            await _asyncio.sleep(async_job_check_time)
+            async_job_check_time = min(
+                async_job_check_time *
+                self.async_job_check_time_scale_percent / 100.0,
+                self.async_job_check_max_time)
+
+            try:
+                job_state = await self._call(self.url, mod + '._check_job',
+                                             [job_id])
+            except _aiohttp.ClientConnectionError:
+                _traceback.print_exc()
+                check_job_failures += 1
+                continue
+
+            if job_state['finished']:
+                if not job_state['result']:
+                    return
+                if len(job_state['result']) == 1:
+                    return job_state['result'][0]
+                return job_state['result']
+        raise RuntimeError("_check_job failed {} times and exceeded limit".format(
+            check_job_failures))
+
+    async def call_method(self, service_method, args, service_ver=None,
+                          context=None):
+        '''
+        Call a standard service.
+        Required arguments:
+        service_method - the service and method to run, e.g. myserv.mymeth.
+        args - a list of arguments to the method.
+        Optional arguments:
+        service_ver - the version of the service to run, e.g. a git hash
+            or dev/beta/release.
+        context - the rpc context dict.
+        '''
+        context = self._set_up_context(service_ver, context)
+        return await self._call(self.url, service_method, args, context)
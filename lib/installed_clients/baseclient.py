@@ -7,14 +7,33 @@
 
 from __future__ import print_function
 
+import gzip as _gzip
+import io as _io
 import json as _json
 import requests as _requests
 import random as _random
 import os as _os
+import re as _re
+import shutil as _shutil
+import tempfile as _tempfile
+import threading as _threading
 import traceback as _traceback
+import uuid as _uuid
+import weakref as _weakref
+from requests.adapters import HTTPAdapter as _HTTPAdapter
 from requests.exceptions import ConnectionError
 from urllib3.exceptions import ProtocolError
 
+try:
+    import orjson as _orjson
+except ImportError:
+    _orjson = None
+
+try:
+    import ijson as _ijson
+except ImportError:
+    _ijson = None
+
 try:
     from configparser import ConfigParser as _ConfigParser  # py 3
 except ImportError:
@@ -24,12 +43,48 @@ try:
     from urllib.parse import urlparse as _urlparse  # py3
 except ImportError:
     from urlparse import urlparse as _urlparse  # py2
+
+try:
+    from http.cookiejar import DefaultCookiePolicy as _DefaultCookiePolicy  # py3
+except ImportError:
+    from cookielib import DefaultCookiePolicy as _DefaultCookiePolicy  # py2
 import time
 
 _CT = 'content-type'
 _AJ = 'application/json'
 _URL_SCHEME = frozenset(['http', 'https'])
 _CHECK_JOB_RETRYS = 3
+_DEFAULT_POOL_SIZE = 10
+# JSON-RPC error code of a request body the server could not parse
+_PARSE_ERROR = -32700
+# request bodies are compressed for bandwidth at a level that costs little CPU
+_GZIP_LEVEL = 1
+
+# JSONFile placeholders, as they appear in an encoded request body
+_JSON_FILES = _weakref.WeakValueDictionary()
+_JSON_FILE_PLACEHOLDER = _re.compile(b'"(__JSONFile_[0-9a-f]{32}__)"')
+
+# pooled sessions shared by every client with the same pool size, so that
+# clients created per call still reuse open keep-alive connections
+_SESSIONS = {}
+_SESSIONS_LOCK = _threading.Lock()
+
+
+def _get_session(pool_size):
+    # The session keeps no cookies, so apart from its connection pools (which
+    # urllib3 makes thread safe) it holds no state and is shared by threads.
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(pool_size)
+        if session is None:
+            session = _requests.Session()
+            session.cookies.set_policy(
+                _DefaultCookiePolicy(allowed_domains=[]))
+            adapter = _HTTPAdapter(pool_connections=pool_size,
+                                   pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _SESSIONS[pool_size] = session
+        return session
 
 
 def _get_token(user_id, password, auth_svc):
@@ -87,6 +142,132 @@ class ServerError(Exception):
             '\n' + self.data
 
 
+class JSONFile(object):
+    '''
+    A JSON value stored in a file, to be passed anywhere in the arguments of
+    a call. The file's contents are spliced verbatim into the request body
+    and streamed from disk, so a large value is never encoded or held in
+    memory. The file must hold valid UTF-8 JSON and must not change until the
+    call returns.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.placeholder = '__JSONFile_{}__'.format(_uuid.uuid4().hex)
+        _JSON_FILES[self.placeholder] = self
+
+
+class _ChainedBody(object):
+    '''
+    A request body read from byte strings and JSONFiles in turn. Its length is
+    known up front, so requests sends it with a Content-Length header.
+    '''
+
+    def __init__(self, parts):
+        self._parts = parts
+        self._length = sum(len(part) if isinstance(part, bytes)
+                           else _os.path.getsize(part.path)
+                           for part in parts)
+        self._index = 0
+        self._current = None
+
+    def __len__(self):
+        return self._length
+
+    def read(self, size=-1):
+        chunks = []
+        remaining = size
+        while remaining != 0 and self._index < len(self._parts):
+            if self._current is None:
+                part = self._parts[self._index]
+                self._current = (_io.BytesIO(part) if isinstance(part, bytes)
+                                 else open(part.path, 'rb'))
+            chunk = self._current.read(remaining)
+            if not chunk:
+                self._current.close()
+                self._current = None
+                self._index += 1
+                continue
+            chunks.append(chunk)
+            if remaining > 0:
+                remaining -= len(chunk)
+        return b''.join(chunks)
+
+    def close(self):
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+
+
+def _splice_json_files(body):
+    # replace the JSONFile placeholders in an encoded body with the files
+    if isinstance(body, str):
+        if '"__JSONFile_' not in body:
+            return body
+        body = body.encode('utf-8')
+    parts = []
+    start = 0
+    for match in _JSON_FILE_PLACEHOLDER.finditer(body):
+        json_file = _JSON_FILES.get(match.group(1).decode())
+        if json_file is None:
+            continue
+        parts.append(body[start:match.start()])
+        parts.append(json_file)
+        start = match.end()
+    if not parts:
+        return body
+    parts.append(body[start:])
+    return _ChainedBody(parts)
+
+
+def _gzip_body(body):
+    # gzip a request body; bodies spliced from files are compressed to an
+    # anonymous temporary file so they are still sent with a known length
+    if not isinstance(body, _ChainedBody):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        return _gzip.compress(body, _GZIP_LEVEL)
+    compressed = _tempfile.TemporaryFile()
+    with _gzip.GzipFile(fileobj=compressed, mode='wb',
+                        compresslevel=_GZIP_LEVEL) as gzip_file:
+        _shutil.copyfileobj(body, gzip_file, 1024 * 1024)
+    compressed.seek(0)
+    return compressed
+
+
+def _encode_body(body, gzip_requests_over):
+    # an encoded request body as bytes or a _ChainedBody, gzipped when it is
+    # larger than gzip_requests_over bytes; returns it and whether it was
+    # gzipped. Shared with AsyncBaseClient.
+    if isinstance(body, str):
+        # compare the size in bytes with gzip_requests_over, not characters
+        body = body.encode('utf-8')
+    if gzip_requests_over is None or len(body) <= gzip_requests_over:
+        return body, False
+    try:
+        return _gzip_body(body), True
+    finally:
+        if isinstance(body, _ChainedBody):
+            body.close()
+
+
+def _gzip_rejected(status, content_type, read_content):
+    # whether the server turned away a gzipped request body, either as an
+    # unsupported media type, as a bad request (servers that do not decode
+    # request bodies often answer so) or as a body it could not parse;
+    # read_content returns the response body and is only called for a JSON
+    # error. A plain resend of a request that was bad anyway fails again.
+    if status in (400, 415):
+        return True
+    if status != 500 or content_type != _AJ:
+        return False
+    try:
+        error = _json.loads(read_content()).get('error') or {}
+    except ValueError:
+        return False
+    return isinstance(error, dict) and error.get('code') == _PARSE_ERROR
+
+
 class _JSONObjectEncoder(_json.JSONEncoder):
 
     def default(self, obj):
@@ -94,9 +275,59 @@ class _JSONObjectEncoder(_json.JSONEncoder):
             return list(obj)
         if isinstance(obj, frozenset):
             return list(obj)
+        if isinstance(obj, JSONFile):
+            return obj.placeholder
         return _json.JSONEncoder.default(self, obj)
 
 
+class _StdlibJSONCodec(object):
+    '''
+    Encodes request bodies and decodes responses with the json module.
+    '''
+    name = 'json'
+
+    def dumps(self, obj):
+        return _json.dumps(obj, cls=_JSONObjectEncoder)
+
+    def loads(self, body):
+        return _json.loads(body)
+
+
+def _orjson_default(obj):
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, JSONFile):
+        return obj.placeholder
+    raise TypeError('Object of type {} is not JSON serializable'.format(
+        type(obj).__name__))
+
+
+class _OrjsonCodec(_StdlibJSONCodec):
+    '''
+    Encodes and decodes with orjson, which works on UTF-8 bytes in native code
+    and so skips the intermediate str of the json module. Bodies orjson
+    refuses (e.g. integers over 64 bits) fall back to the json module.
+    '''
+    name = 'orjson'
+
+    def dumps(self, obj):
+        try:
+            return _orjson.dumps(obj, default=_orjson_default,
+                                 option=_orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            return super(_OrjsonCodec, self).dumps(obj)
+
+    def loads(self, body):
+        try:
+            return _orjson.loads(body)
+        except ValueError:
+            return super(_OrjsonCodec, self).loads(body)
+
+
+def _default_codec():
+    return _OrjsonCodec() if _orjson is not None else _StdlibJSONCodec()
+
+
 class BaseClient(object):
     '''
     The KBase base client.
@@ -120,6 +351,18 @@ class BaseClient(object):
     lookup_url - set to true when contacting KBase dynamic services.
     async_job_check_time_ms - the wait time between checking job state for
         asynchronous jobs run with the run_job method.
+    pool_size - the most keep-alive connections kept open per host, shared by
+        every client with the same pool size. Defaults to the
+        KB_CLIENT_POOL_SIZE environment variable, or 10.
+    json_codec - an object with dumps(obj) -> str or bytes and
+        loads(str or bytes) -> obj methods used for request and response
+        bodies. Defaults to orjson when it is installed, otherwise the json
+        module.
+    gzip_requests_over - send request bodies larger than this many bytes with
+        Content-Encoding: gzip. If the server rejects a gzipped body the call
+        is resent uncompressed and the client stops compressing. Defaults to
+        the KB_CLIENT_GZIP_REQUESTS_OVER environment variable, or no
+        compression. Responses are always accepted gzipped.
     '''
     def __init__(
             self, url=None, timeout=30 * 60, user_id=None,
@@ -129,7 +372,10 @@ class BaseClient(object):
             lookup_url=False,
             async_job_check_time_ms=100,
             async_job_check_time_scale_percent=150,
-            async_job_check_max_time_ms=300000):
+            async_job_check_max_time_ms=300000,
+            pool_size=None,
+            json_codec=None,
+            gzip_requests_over=None):
         if url is None:
             raise ValueError('A url is required')
         scheme, _, _, _, _, _ = _urlparse(url)
@@ -163,8 +409,21 @@ class BaseClient(object):
                         authdata['user_id'], authdata['password'], auth_svc)
         if self.timeout < 1:
             raise ValueError('Timeout value must be at least 1 second')
+        if pool_size is None:
+            pool_size = _os.environ.get('KB_CLIENT_POOL_SIZE',
+                                        _DEFAULT_POOL_SIZE)
+        self.pool_size = int(pool_size)
+        if self.pool_size < 1:
+            raise ValueError('Pool size must be at least 1')
+        self._session = _get_session(self.pool_size)
+        self._codec = json_codec or _default_codec()
+        if gzip_requests_over is None:
+            gzip_requests_over = _os.environ.get(
+                'KB_CLIENT_GZIP_REQUESTS_OVER')
+        self.gzip_requests_over = (None if gzip_requests_over in (None, '')
+                                   else int(gzip_requests_over))
 
-    def _call(self, url, method, params, context=None):
+    def _post(self, url, method, params, context=None, stream=False):
         arg_hash = {'method': method,
                     'params': params,
                     'version': '1.1',
@@ -175,14 +434,30 @@ class BaseClient(object):
                 raise ValueError('context is not type dict as required.')
             arg_hash['context'] = context
 
-        body = _json.dumps(arg_hash, cls=_JSONObjectEncoder)
-        ret = _requests.post(url, data=body, headers=self._headers,
-                             timeout=self.timeout,
-                             verify=not self.trust_all_ssl_certificates)
+        body, compressed = _encode_body(
+            _splice_json_files(self._codec.dumps(arg_hash)),
+            self.gzip_requests_over)
+        headers = self._headers
+        if compressed:
+            headers = dict(self._headers)
+            headers['Content-Encoding'] = 'gzip'
+        try:
+            ret = self._session.post(
+                url, data=body, headers=headers, timeout=self.timeout,
+                verify=not self.trust_all_ssl_certificates, stream=stream)
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+        if compressed and _gzip_rejected(ret.status_code, ret.headers.get(_CT),
+                                         lambda: ret.content):
+            # the server does not take gzipped bodies, stop sending them
+            ret.close()
+            self.gzip_requests_over = None
+            return self._post(url, method, params, context, stream)
         ret.encoding = 'utf-8'
         if ret.status_code == 500:
             if ret.headers.get(_CT) == _AJ:
-                err = ret.json()
+                err = self._codec.loads(ret.content)
                 if 'error' in err:
                     raise ServerError(**err['error'])
                 else:
@@ -191,7 +466,11 @@ class BaseClient(object):
                 raise ServerError('Unknown', 0, ret.text)
         if not ret.ok:
             ret.raise_for_status()
-        resp = ret.json()
+        return ret
+
+    def _call(self, url, method, params, context=None):
+        ret = self._post(url, method, params, context)
+        resp = self._codec.loads(ret.content)
         if 'result' not in resp:
             raise ServerError('Unknown', 0, 'An unknown server error occurred')
         if not resp['result']:
@@ -200,6 +479,16 @@ class BaseClient(object):
             return resp['result'][0]
         return resp['result']
 
+    def _call_iter(self, url, method, params, item_path, context=None):
+        if _ijson is None:
+            raise ImportError('Streaming responses requires the ijson package')
+        ret = self._post(url, method, params, context, stream=True)
+        with ret:
+            # let urllib3 undo any Content-Encoding as the body is read
+            ret.raw.decode_content = True
+            for key, value in _ijson.kvitems(ret.raw, item_path):
+                yield key, value
+
     def _get_service_url(self, service_method, service_version):
         if not self.lookup_url:
             return self.url
@@ -280,3 +569,25 @@ class BaseClient(object):
         url = self._get_service_url(service_method, service_ver)
         context = self._set_up_context(service_ver, context)
         return self._call(url, service_method, args, context)
+
+    def call_method_iter(self, service_method, args, item_path,
+                         service_ver=None, context=None):
+        '''
+        Call a standard or dynamic service synchronously and yield the
+        (key, value) pairs of the JSON object at item_path in the response as
+        they are parsed, without holding the whole response in memory.
+        Requires the ijson package.
+        Required arguments:
+        service_method - the service and method to run, e.g. myserv.mymeth.
+        args - a list of arguments to the method.
+        item_path - the ijson prefix of the object, e.g.
+            result.item.data.item.data for the data of the first object
+            returned by Workspace.get_objects2.
+        Optional arguments:
+        service_ver - the version of the service to run, e.g. a git hash
+            or dev/beta/release.
+        context - the rpc context dict.
+        '''
+        url = self._get_service_url(service_method, service_ver)
+        context = self._set_up_context(service_ver, context)
+        return self._call_iter(url, service_method, args, item_path, context)
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import gzip
 import json
 import os
 import shutil
@@ -6,6 +7,10 @@ import time
 import unittest
 from configparser import ConfigParser
 
+from Bio import AlignIO, SeqIO
+
+from MSAUtils.Core.ExportCache import ExportCache
+from MSAUtils.Core.ObjectCache import ObjectCache
 from MSAUtils.authclient import KBaseAuth as _KBaseAuth
 from MSAUtils.MSAUtilsImpl import MSAUtils
 from MSAUtils.MSAUtilsServer import MethodContext
@@ -82,12 +87,154 @@ class MSAUtilsTest(unittest.TestCase):
                                                           'msa_name': 'test_msa',
                                                           'description': 'Foo!'})
 
+    def test_import_msa_fasta_unequal_lengths(self):
+        bad_file_path = os.path.join(self.scratch, 'unequal.fasta')
+        with open(bad_file_path, 'w') as bad_file:
+            bad_file.write('>seq1\nACGT\n>seq2\nACG\n')
+
+        with self.assertRaisesRegex(ValueError, "Sequences must all be the same length"):
+            self.serviceImpl.import_msa_file(self.ctx, {'workspace_name': self.wsName,
+                                                        'input_file_path': bad_file_path,
+                                                        'msa_name': 'test_msa'})
+
+    def test_import_msa_fasta_gzip(self):
+        gzip_file_path = os.path.join(self.scratch, 'MSA.fasta.gz')
+        with open(self.fasta_file_path, 'rb') as fasta_file, \
+                gzip.open(gzip_file_path, 'wb') as gzip_file:
+            shutil.copyfileobj(fasta_file, gzip_file)
+
+        ret = self.serviceImpl.import_msa_file(self.ctx, {'workspace_name': self.wsName,
+                                                          'input_file_path': gzip_file_path,
+                                                          'msa_name': 'test_msa_gzip'})[0]
+        self.assertIn('msa_obj_ref', ret)
+
+    def test_import_msa_fasta_parallel(self):
+        # enough records for every worker to parse several chunks
+        fasta = AlignIO.read(self.fasta_file_path, 'fasta')
+        parallel_file_path = os.path.join(self.scratch, 'MSA_parallel.fasta')
+        with open(parallel_file_path, 'w') as parallel_file:
+            for copy in range(100):
+                for record in fasta:
+                    parallel_file.write(f'>{record.id}_{copy} copy {copy}\n{record.seq}\n')
+
+        saved = []
+        for msa_name, parallel_workers in [('test_msa_serial', 1), ('test_msa_parallel', 2)]:
+            ret = self.serviceImpl.import_msa_file(self.ctx, {
+                'workspace_name': self.wsName,
+                'input_file_path': parallel_file_path,
+                'msa_name': msa_name,
+                'parallel_workers': parallel_workers})[0]
+            saved.append(self.wsClient.get_objects2(
+                {'objects': [{'ref': ret['msa_obj_ref']}]})['data'][0]['data'])
+
+        serial, parallel = saved
+        self.assertEqual(len(parallel['row_order']), 100 * len(fasta))
+        self.assertEqual(parallel['row_order'], serial['row_order'])
+        self.assertEqual(parallel['alignment'], serial['alignment'])
+
+        with self.assertRaisesRegex(ValueError, 'parallel_workers must be at least 1'):
+            self.serviceImpl.import_msa_file(self.ctx, {'workspace_name': self.wsName,
+                                                        'input_file_path': parallel_file_path,
+                                                        'msa_name': 'test_msa_parallel',
+                                                        'parallel_workers': 0})
+
+    def test_import_msa_fasta_streamed_save(self):
+        futil = self.serviceImpl.futil
+        stream_save_bytes = futil.stream_save_bytes
+        futil.stream_save_bytes = 0
+        try:
+            ret = self.serviceImpl.import_msa_file(self.ctx, {
+                'workspace_name': self.wsName,
+                'input_file_path': self.fasta_file_path,
+                'msa_name': 'test_msa_streamed',
+                'description': 'Foo!'})[0]
+        finally:
+            futil.stream_save_bytes = stream_save_bytes
+
+        data = self.wsClient.get_objects2(
+            {'objects': [{'ref': ret['msa_obj_ref']}]})['data'][0]['data']
+        fasta = AlignIO.read(self.fasta_file_path, 'fasta')
+        self.assertEqual(data['description'], 'Foo!')
+        self.assertEqual([data['alignment'][row_id] for row_id in data['row_order']],
+                         [str(record.seq) for record in fasta])
+
+    def test_import_msa_ambiguous_dna(self):
+        dna_file_path = os.path.join(self.scratch, 'ambiguous.fasta')
+        with open(dna_file_path, 'w') as dna_file:
+            dna_file.write('>seq1\nACGTNRY-\n>seq2\nacgu.WSN\n')
+
+        ret = self.serviceImpl.import_msa_file(self.ctx, {'workspace_name': self.wsName,
+                                                          'input_file_path': dna_file_path,
+                                                          'msa_name': 'test_msa_dna'})[0]
+        data = self.wsClient.get_objects2(
+            {'objects': [{'ref': ret['msa_obj_ref']}]})['data'][0]['data']
+        self.assertEqual(data['sequence_type'], 'dna')
+
     def test_import_msa_clustal(self):
         ret = self.serviceImpl.import_msa_file(self.ctx, {'workspace_name': self.wsName,
                                                           'input_file_path': self.clustal_file_path,
                                                           'msa_name': 'test_msa',
                                                           'file_format': 'clustal'})
 
+    def test_import_msa_auto_format(self):
+        ret = self.serviceImpl.import_msa_file(self.ctx, {'workspace_name': self.wsName,
+                                                          'input_file_path': self.clustal_file_path,
+                                                          'msa_name': 'test_msa_auto',
+                                                          'file_format': 'auto'})[0]
+        self.assertIn('msa_obj_ref', ret)
+
+    def test_import_msa_auto_format_relaxed_phylip(self):
+        # names shorter than the 10 columns of strict PHYLIP, as write_phylip_relaxed pads them
+        phylip_file_path = os.path.join(self.scratch, 'short_names.phy')
+        with open(phylip_file_path, 'w') as phylip_file:
+            phylip_file.write(' 2 14\ns1  ACGTACGTAC GTAC\ns22 ACGTACGTAC GTA-\n')
+
+        ret = self.serviceImpl.import_msa_file(self.ctx, {'workspace_name': self.wsName,
+                                                          'input_file_path': phylip_file_path,
+                                                          'msa_name': 'test_msa_auto_phylip',
+                                                          'file_format': 'auto'})[0]
+        data = self.wsClient.get_objects2(
+            {'objects': [{'ref': ret['msa_obj_ref']}]})['data'][0]['data']
+        self.assertEqual(data['alignment_length'], 14)
+        self.assertEqual(data['row_order'], ['s1', 's22'])
+        self.assertEqual(data['alignment']['s22'], 'ACGTACGTACGTA-')
+
+    def test_import_msa_wrong_format(self):
+        with self.assertRaisesRegex(ValueError, "looks like clustal rather than fasta"):
+            self.serviceImpl.import_msa_file(self.ctx, {'workspace_name': self.wsName,
+                                                        'input_file_path': self.clustal_file_path,
+                                                        'msa_name': 'test_msa',
+                                                        'file_format': 'fasta'})
+
+    def test_import_multiple_alignments(self):
+        multiple_file_path = os.path.join(self.scratch, 'MSA_multiple.sto')
+        shutil.copy(os.path.join('data', 'MSA_multiple.sto'), multiple_file_path)
+
+        ret = self.serviceImpl.import_msa_file(self.ctx, {'workspace_name': self.wsName,
+                                                          'input_file_path': multiple_file_path,
+                                                          'msa_name': 'test_family',
+                                                          'file_format': 'stockholm',
+                                                          'multiple_alignments': 1})[0]
+        self.assertEqual(len(ret['msa_obj_refs']), 2)
+        self.assertEqual(ret['msa_obj_ref'], ret['msa_obj_refs'][0])
+
+    def test_import_multiple_alignments_blocking(self):
+        multiple_file_path = os.path.join(self.scratch, 'MSA_multiple.sto')
+        shutil.copy(os.path.join('data', 'MSA_multiple.sto'), multiple_file_path)
+
+        futil = self.serviceImpl.futil
+        futil.async_import = False
+        try:
+            ret = self.serviceImpl.import_msa_file(self.ctx, {'workspace_name': self.wsName,
+                                                              'input_file_path': multiple_file_path,
+                                                              'msa_name': 'test_family_blocking',
+                                                              'file_format': 'stockholm',
+                                                              'multiple_alignments': 1})[0]
+        finally:
+            futil.async_import = True
+        self.assertEqual(len(ret['msa_obj_refs']), 2)
+        self.assertIn('report_ref', ret)
+
     def test_msa_to_fasta(self):
         ret = self.serviceImpl.msa_to_fasta_file(self.ctx, {'destination_dir': "./",
                                                             'input_ref': self.msa_ref})
@@ -95,13 +242,199 @@ class MSAUtilsTest(unittest.TestCase):
     def test_msa_to_clustal(self):
         ret = self.serviceImpl.msa_to_clustal_file(self.ctx, {'destination_dir': "./",
                                                               'input_ref': self.msa_ref})
+        with open(ret[0]['file_path']) as clustal_file, open('data/MSA.clustal') as expected:
+            self.assertEqual(clustal_file.read(), expected.read())
+
+    def test_msa_to_phylip_and_stockholm(self):
+        data = json.load(open('data/MSA.json'))
+        expected = [data['alignment'][row_id] for row_id in data['row_order']]
+        for method, file_format in [(self.serviceImpl.msa_to_phylip_file, 'phylip-relaxed'),
+                                    (self.serviceImpl.msa_to_stockholm_file, 'stockholm')]:
+            ret = method(self.ctx, {'destination_dir': "./", 'input_ref': self.msa_ref})[0]
+            self.assertTrue(ret['file_path'].endswith(('.phylip', '.stockholm')))
+            msa = AlignIO.read(ret['file_path'], file_format)
+            self.assertEqual([str(record.seq) for record in msa], expected)
+
+    def test_msa_to_a3m(self):
+        ret = self.serviceImpl.msa_to_a3m_file(self.ctx, {'destination_dir': "./",
+                                                          'input_ref': self.msa_ref})[0]
+        with open(ret['file_path']) as a3m_file:
+            sequences = [line for line in a3m_file.read().splitlines()
+                         if not line.startswith('>')]
+        # every row has the same match columns, uppercase residues or '-'
+        match_lengths = {sum(1 for char in sequence if char.isupper() or char == '-')
+                         for sequence in sequences}
+        self.assertEqual(len(match_lengths), 1)
+        self.assertNotIn('.', ''.join(sequences))
+
+    def test_msa_to_fasta_subset(self):
+        ret = self.serviceImpl.msa_to_fasta_file(self.ctx, {'destination_dir': "./",
+                                                            'input_ref': self.msa_ref,
+                                                            'rows': ['32360/4/2.f:AT1G27970'],
+                                                            'column_range': [25, 34]})[0]
+        with open(ret['file_path']) as fasta_file:
+            self.assertEqual(fasta_file.read().splitlines()[1:], ['MSQMDPDAVS'])
+
+    def test_msa_to_fasta_column_range_past_end(self):
+        length = self.wsClient.get_objects2({'objects': [
+            {'ref': self.msa_ref, 'included': ['/alignment_length']}]})['data'][0]['data'][
+            'alignment_length']
+        for column_range in ([length - 9, length + 1], [length + 1, length + 10]):
+            with self.assertRaisesRegex(ValueError, 'past the alignment length'):
+                self.serviceImpl.msa_to_fasta_file(self.ctx, {'destination_dir': "./",
+                                                              'input_ref': self.msa_ref,
+                                                              'column_range': column_range})
+
+    def test_msa_to_fasta_streamed(self):
+        params = {'destination_dir': "./", 'input_ref': self.msa_ref}
+        with open(self.serviceImpl.msa_to_fasta_file(self.ctx, params)[0]['file_path']) as f:
+            expected = f.read()
+
+        # stream every object and bypass the object cache
+        futil = self.serviceImpl.futil
+        saved = futil.stream_object_bytes, futil.object_cache.max_bytes
+        futil.stream_object_bytes, futil.object_cache.max_bytes = 0, 0
+        try:
+            ret = self.serviceImpl.msa_to_fasta_file(self.ctx, params)[0]
+        finally:
+            futil.stream_object_bytes, futil.object_cache.max_bytes = saved
+        with open(ret['file_path']) as fasta_file:
+            self.assertEqual(fasta_file.read(), expected)
+
+    def test_msa_to_fasta_gap_filter(self):
+        ret = self.serviceImpl.msa_to_fasta_file(self.ctx, {'destination_dir': "./",
+                                                            'input_ref': self.msa_ref,
+                                                            'max_gap_fraction': 0})[0]
+        with open(ret['file_path']) as fasta_file:
+            sequences = [line for line in fasta_file.read().splitlines()
+                         if not line.startswith('>')]
+        self.assertNotIn('-', ''.join(sequences))
 
     def test_export_fasta(self):
         ret = self.serviceImpl.export_msa_as_fasta_file(self.ctx, {'input_ref': self.msa_ref})
 
+    def test_export_fasta_cached(self):
+        futil = self.serviceImpl.futil
+        export_cache = futil.export_cache
+        futil.export_cache = ExportCache(os.path.join(self.scratch, 'export_cache'))
+        try:
+            first = self.serviceImpl.export_msa_as_fasta_file(self.ctx,
+                                                              {'input_ref': self.msa_ref})[0]
+            # an unversioned reference resolves to the same cache entry
+            unversioned_ref = self.msa_ref.rsplit('/', 1)[0]
+            second = self.serviceImpl.export_msa_as_fasta_file(self.ctx,
+                                                               {'input_ref': unversioned_ref})[0]
+        finally:
+            futil.export_cache = export_cache
+        self.assertEqual(first['shock_id'], second['shock_id'])
+
+    def test_object_cache_eviction(self):
+        cache_dir = os.path.join(self.scratch, 'object_cache_eviction')
+        obj_data = {'alignment': {'row1': 'ACGT' * 100}, 'alignment_length': 400}
+        object_dir = os.path.join(cache_dir, 'objects')
+        ObjectCache(cache_dir).put('1/1/1', 'probe', obj_data)
+        entry_bytes = os.path.getsize(os.path.join(object_dir, os.listdir(object_dir)[0]))
+        shutil.rmtree(cache_dir)
+
+        # room for two entries but not three, so the least recently used one goes when a third
+        # is stored
+        cache = ObjectCache(cache_dir, max_bytes=2 * entry_bytes + entry_bytes // 2,
+                            max_object_bytes=1000)
+        cache.put('1/1/1', 'first', obj_data)
+        cache.put('1/2/1', 'second', obj_data)
+        self.assertEqual(cache.get('1/1/1'), ('first', obj_data))
+        cache.put('1/3/1', 'third', obj_data)
+        self.assertIsNone(cache.get('1/2/1'))
+        self.assertEqual(cache.get('1/1/1'), ('first', obj_data))
+        self.assertEqual(cache.get('1/3/1'), ('third', obj_data))
+        self.assertEqual(len(os.listdir(object_dir)), 2)
+
+        # objects whose workspace size is over max_object_bytes are not stored
+        cache.put('1/4/1', 'large', obj_data, size=1001)
+        self.assertIsNone(cache.get('1/4/1'))
+        self.assertEqual(cache.get('1/3/1'), ('third', obj_data))
+
+    def test_msa_to_fasta_object_cached(self):
+        futil = self.serviceImpl.futil
+        object_cache = futil.object_cache
+        get_object_rows = futil._get_object_rows
+        futil.object_cache = ObjectCache(os.path.join(self.scratch, 'object_cache'))
+        try:
+            self.serviceImpl.msa_to_fasta_file(self.ctx, {'destination_dir': "./",
+                                                          'input_ref': self.msa_ref})
+
+            # the rows now come from the cached object, not from the workspace
+            def fetch_rows(input_ref, rows):
+                raise AssertionError('rows fetched from the workspace')
+            futil._get_object_rows = fetch_rows
+            ret = self.serviceImpl.msa_to_fasta_file(self.ctx, {'destination_dir': "./",
+                                                                'input_ref': self.msa_ref,
+                                                                'rows': ['32360/4/2.f:AT1G27970'],
+                                                                'column_range': [25, 34]})[0]
+        finally:
+            futil.object_cache = object_cache
+            futil._get_object_rows = get_object_rows
+        with open(ret['file_path']) as fasta_file:
+            self.assertEqual(fasta_file.read().splitlines()[1:], ['MSQMDPDAVS'])
+
     def test_export_clustal(self):
         ret = self.serviceImpl.export_msa_as_clustal_file(self.ctx, {'input_ref': self.msa_ref})
 
+    def test_export_unaligned_fasta(self):
+        ret = self.serviceImpl.export_msa_as_unaligned_fasta(self.ctx, {'input_ref': self.msa_ref,
+                                                                        'drop_empty_rows': 1})[0]
+        self.assertIn('shock_id', ret)
+
+        file_path = self.serviceImpl.futil.msa_to_file({'destination_dir': "./",
+                                                        'input_ref': self.msa_ref},
+                                                       'unaligned-fasta')['file_path']
+        data = json.load(open('data/MSA.json'))
+        expected = [data['alignment'][row_id].replace('-', '') for row_id in data['row_order']]
+        self.assertEqual([str(record.seq) for record in SeqIO.parse(file_path, 'fasta')],
+                         expected)
+
+    def test_export_files(self):
+        ret = self.serviceImpl.export_msa_files(self.ctx, {'input_ref': self.msa_ref,
+                                                           'formats': ['fasta', 'clustal']})[0]
+        self.assertCountEqual(ret['shock_ids'], ['fasta', 'clustal'])
+
+    def test_export_files_phylip_variants(self):
+        data = {'alignment': {'s1': 'ACGTACGTACGTAC', 's22': 'ACGTACGTACGTA-'},
+                'row_order': ['s1', 's22'],
+                'alignment_length': 14,
+                'sequence_type': 'dna'}
+        info = self.wsClient.save_objects({'workspace': self.wsName, 'objects': [
+            {'type': 'KBaseTrees.MSA', 'name': 'test_msa_phylip_variants', 'data': data}]})[0]
+
+        # both variants are named <obj>.phylip.gz, so each must be written to its own file
+        futil = self.serviceImpl.futil
+        upload_files_to_shock = futil._upload_files_to_shock
+        uploaded = []
+
+        def upload(file_paths):
+            uploaded.extend(file_paths)
+            return [str(index) for index, _ in enumerate(file_paths)]
+
+        futil._upload_files_to_shock = upload
+        try:
+            futil.export_files({'input_ref': f'{info[6]}/{info[0]}/{info[4]}',
+                                'formats': ['phylip', 'phylip-relaxed']})
+        finally:
+            futil._upload_files_to_shock = upload_files_to_shock
+
+        self.assertEqual(len(set(uploaded)), 2)
+        for file_path, file_format in zip(uploaded, ['phylip', 'phylip-relaxed']):
+            self.assertTrue(file_path.endswith('test_msa_phylip_variants.phylip.gz'))
+            with gzip.open(file_path, 'rt') as phylip_file:
+                msa = AlignIO.read(phylip_file, file_format)
+            self.assertEqual([str(record.seq) for record in msa],
+                             [data['alignment'][row_id] for row_id in data['row_order']])
+
+    def test_export_batch(self):
+        ret = self.serviceImpl.export_msas_batch(self.ctx, {'input_refs': [self.msa_ref],
+                                                            'format': 'fasta'})[0]
+        self.assertEqual(list(ret['shock_ids']), [self.msa_ref])
+
     def test_bad_input(self):
         with self.assertRaisesRegex(ValueError, "parameter is required, but missing"):
             ret = self.serviceImpl.import_msa_file(self.ctx, {'msa_name': 'test_msa',
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import gzip
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from installed_clients import baseclient
+from installed_clients.asyncbaseclient import AsyncBaseClient
+from installed_clients.baseclient import BaseClient, JSONFile, ServerError
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    A JSON-RPC service that echoes the params of each call back as its result and records the
+    requests it saw. server.reject_gzip makes it turn gzipped bodies away with the response
+    given, as a server without request decompression would.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _respond(self, status, body, content_type='application/json'):
+        body = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        encoding = self.headers.get('Content-Encoding')
+        self.server.requests.append({'encoding': encoding,
+                                     'length': int(self.headers['Content-Length']),
+                                     'port': self.client_address[1]})
+
+        if encoding == 'gzip':
+            if self.server.reject_gzip in (400, 415):
+                return self._respond(self.server.reject_gzip, 'Rejected', 'text/plain')
+            if self.server.reject_gzip == 'parse':
+                return self._respond(500, json.dumps(
+                    {'version': '1.1', 'error': {'name': 'JSONRPCError', 'code': -32700,
+                                                 'message': 'Parse error'}}))
+            body = gzip.decompress(body)
+
+        request = json.loads(body)
+        self.server.requests[-1]['params'] = request['params']
+        if request['method'] == 'Stub.fail':
+            return self._respond(500, json.dumps(
+                {'version': '1.1', 'error': {'name': 'JSONRPCError', 'code': -32000,
+                                             'message': 'failed'}}))
+        self._respond(200, json.dumps({'version': '1.1', 'result': request['params']}))
+
+
+class StubServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        self.server.requests = []
+        self.server.reject_gzip = None
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class BaseClientTest(StubServerTest):
+
+    def client(self, **kwargs):
+        # each test gets its own pool size, and so its own pooled session
+        kwargs.setdefault('pool_size', 1000 + self.server.server_port)
+        return BaseClient(self.url, token='token', **kwargs)
+
+    def test_small_body_not_gzipped(self):
+        client = self.client(gzip_requests_over=1024)
+        self.assertEqual(client.call_method('Stub.echo', ['ACGT']), 'ACGT')
+        self.assertIsNone(self.server.requests[0]['encoding'])
+
+    def test_large_body_gzipped(self):
+        client = self.client(gzip_requests_over=1024)
+        self.assertEqual(client.call_method('Stub.echo', ['ACGT' * 1000]), 'ACGT' * 1000)
+        request = self.server.requests[0]
+        self.assertEqual(request['encoding'], 'gzip')
+        self.assertLess(request['length'], 1024)
+
+    def test_gzip_threshold_counts_bytes(self):
+        class UnescapedCodec(baseclient._StdlibJSONCodec):
+            def dumps(self, obj):
+                return json.dumps(obj, ensure_ascii=False)
+
+        # 300 characters but 600 bytes of UTF-8
+        client = self.client(gzip_requests_over=400, json_codec=UnescapedCodec())
+        self.assertEqual(client.call_method('Stub.echo', ['é' * 300]), 'é' * 300)
+        self.assertEqual(self.server.requests[0]['encoding'], 'gzip')
+
+    def test_gzip_rejected_415_resent_plain(self):
+        self.server.reject_gzip = 415
+        client = self.client(gzip_requests_over=1024)
+        self.assertEqual(client.call_method('Stub.echo', ['ACGT' * 1000]), 'ACGT' * 1000)
+        self.assertEqual([request['encoding'] for request in self.server.requests],
+                         ['gzip', None])
+        # the client stops compressing once the server has turned gzip away
+        self.assertIsNone(client.gzip_requests_over)
+        client.call_method('Stub.echo', ['ACGT' * 1000])
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertIsNone(self.server.requests[2]['encoding'])
+
+    def test_gzip_rejected_resent_plain(self):
+        for reject_gzip in (400, 'parse'):
+            self.server.reject_gzip = reject_gzip
+            self.server.requests.clear()
+            client = self.client(gzip_requests_over=1024)
+            self.assertEqual(client.call_method('Stub.echo', ['ACGT' * 1000]), 'ACGT' * 1000)
+            self.assertEqual([request['encoding'] for request in self.server.requests],
+                             ['gzip', None])
+
+    def test_server_error_not_resent(self):
+        client = self.client(gzip_requests_over=1024)
+        with self.assertRaisesRegex(ServerError, 'failed'):
+            client.call_method('Stub.fail', ['ACGT' * 1000])
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(client.gzip_requests_over, 1024)
+
+    def test_json_file_spliced(self):
+        data = {'alignment': {'row1': 'ACGT' * 1000}, 'alignment_length': 4000}
+        for reject_gzip in (None, 415):
+            self.server.reject_gzip = reject_gzip
+            self.server.requests.clear()
+            with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as json_file:
+                json.dump(data, json_file)
+            try:
+                # gzipped through a temporary file, and resent from the JSONFile when rejected
+                client = self.client(gzip_requests_over=1024)
+                result = client.call_method('Stub.echo', [{'data': JSONFile(json_file.name)}])
+            finally:
+                os.remove(json_file.name)
+            self.assertEqual(result, {'data': data})
+            self.assertEqual(self.server.requests[0]['encoding'], 'gzip')
+            self.assertEqual(len(self.server.requests), 2 if reject_gzip else 1)
+
+    def test_pooled_connection_reused(self):
+        first = self.client()
+        second = self.client()
+        self.assertIs(first._session, second._session)
+        for client in (first, second, first):
+            client.call_method('Stub.echo', ['ACGT'])
+        self.assertEqual(len({request['port'] for request in self.server.requests}), 1)
+
+    def test_codec_fallback(self):
+        codecs = [baseclient._StdlibJSONCodec()]
+        if baseclient._orjson is not None:
+            codecs.append(baseclient._OrjsonCodec())
+        for codec in codecs:
+            client = self.client(json_codec=codec)
+            # orjson refuses integers over 64 bits, which fall back to the json module
+            self.assertEqual(client.call_method('Stub.echo', [2 ** 70]), 2 ** 70)
+            self.assertEqual(client.call_method('Stub.echo', [{'ACGT'}]), ['ACGT'])
+
+    def test_default_codec(self):
+        expected = 'json' if baseclient._orjson is None else 'orjson'
+        self.assertEqual(baseclient._default_codec().name, expected)
+
+
+@unittest.skipUnless(AsyncBaseClient.available(), 'aiohttp is not installed')
+class AsyncBaseClientTest(StubServerTest):
+
+    def call(self, client, *calls):
+        async def run():
+            async with client:
+                return [await client.call_method(method, params) for method, params in calls]
+        return asyncio.run(run())
+
+    def test_large_body_gzipped(self):
+        client = AsyncBaseClient(self.url, token='token', gzip_requests_over=1024)
+        self.assertEqual(self.call(client, ('Stub.echo', ['ACGT']),
+                                   ('Stub.echo', ['ACGT' * 1000])), ['ACGT', 'ACGT' * 1000])
+        self.assertEqual([request['encoding'] for request in self.server.requests],
+                         [None, 'gzip'])
+
+    def test_gzip_rejected_resent_plain(self):
+        for reject_gzip in (400, 415, 'parse'):
+            self.server.reject_gzip = reject_gzip
+            self.server.requests.clear()
+            client = AsyncBaseClient(self.url, token='token', gzip_requests_over=1024)
+            self.assertEqual(self.call(client, ('Stub.echo', ['ACGT' * 1000])),
+                             ['ACGT' * 1000])
+            self.assertEqual([request['encoding'] for request in self.server.requests],
+                             ['gzip', None])
+            self.assertIsNone(client.gzip_requests_over)
+
+    def test_server_error_not_resent(self):
+        client = AsyncBaseClient(self.url, token='token', gzip_requests_over=1024)
+        with self.assertRaisesRegex(ServerError, 'failed'):
+            self.call(client, ('Stub.fail', ['ACGT' * 1000]))
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_json_file_spliced(self):
+        data = {'alignment': {'row1': 'ACGT' * 1000}, 'alignment_length': 4000}
+        for gzip_requests_over, reject_gzip in [(None, None), (1024, None), (1024, 415)]:
+            self.server.reject_gzip = reject_gzip
+            self.server.requests.clear()
+            with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as json_file:
+                json.dump(data, json_file)
+            try:
+                client = AsyncBaseClient(self.url, token='token',
+                                         gzip_requests_over=gzip_requests_over)
+                result = self.call(client, ('Stub.echo', [{'data': JSONFile(json_file.name)}]))
+            finally:
+                os.remove(json_file.name)
+            self.assertEqual(result, [{'data': data}])
@@ -0,0 +1,65 @@
+"""
+Compare the JSON codecs of installed_clients.baseclient on a KBaseTrees.MSA sized save_objects
+request and get_objects response.
+
+    PYTHONPATH=lib python test/benchmark_baseclient_codec.py --rows 2000 --columns 50000
+
+The file name keeps it out of the nose test run.
+"""
+import argparse
+import random
+import time
+
+from installed_clients import baseclient
+
+
+def msa_payload(rows, columns):
+    """msa_payload: a get_objects style result holding a random protein alignment"""
+    rng = random.Random(0)
+    residues = 'ACDEFGHIKLMNPQRSTVWY-'
+    row_ids = [f'32360/4/2.f:AT{index:07d}' for index in range(rows)]
+    alignment = {row_id: ''.join(rng.choices(residues, k=columns)) for row_id in row_ids}
+    data = {'alignment': alignment,
+            'default_row_labels': {row_id: f'Arabidopsis thaliana - {row_id}'
+                                   for row_id in row_ids},
+            'row_order': row_ids,
+            'alignment_length': columns,
+            'sequence_type': 'protein'}
+    return {'version': '1.1', 'id': '1', 'result': [{'data': [{'data': data}]}]}
+
+
+def best_time(function, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--columns', type=int, default=20000)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    codecs = [baseclient._StdlibJSONCodec()]
+    if baseclient._orjson is not None:
+        codecs.append(baseclient._OrjsonCodec())
+    else:
+        print('orjson is not installed, only the json module is measured')
+
+    payload = msa_payload(args.rows, args.columns)
+    body = codecs[0].dumps(payload)
+    print(f'{args.rows} rows x {args.columns} columns, {len(body) / 1024 ** 2:.1f} MiB of JSON')
+    print(f'{"codec":8} {"dumps s":>8} {"loads s":>8}')
+    for codec in codecs:
+        encoded = codec.dumps(payload)
+        print(f'{codec.name:8} '
+              f'{best_time(lambda: codec.dumps(payload), args.repeats):8.3f} '
+              f'{best_time(lambda: codec.loads(encoded), args.repeats):8.3f}')
+
+
+if __name__ == '__main__':
+    main()